@@ -5,6 +5,7 @@ import pandas as pd
 from joblib import load
 
 from src.model.model_cleaner import filter_teams, european_countries
+from src.utils.schema import enforce_schema
 
 # Scrape today's fixtures
 todays_urls = ['https://www.fotmob.com/en-GB/matches/canada-vs-argentina/1an224#4407872',
@@ -30,10 +31,8 @@ processed_data['datetime'] = pd.to_datetime(processed_data['datetime'])
 # Join them
 master_data = pd.concat([processed_data, todays_df], axis=0)
 
-# make all stats_cols float
-master_data[stats_cols] = master_data[stats_cols].astype(float)
-master_data['ranking'] = master_data['ranking'].astype(int)
-master_data['opp_ranking'] = master_data['opp_ranking'].astype(int)
+# give every column its schema dtype
+master_data = enforce_schema(master_data)
 
 master_data = feature_engineering(master_data, stats_cols)
 
@@ -1,79 +1,19 @@
-import pickle
 import pandas as pd
-import re
+from src.utils.competition import parse_competitions
+from src.utils.id_registry import map_ids
 
 
 def simple_cleaner(raw_data):
-    # rename
-    raw_data['ranking'] = raw_data['ranking'].str.replace('#', '')
-    raw_data['opp_ranking'] = raw_data['opp_ranking'].str.replace('#', '')
-
     # make datetime column to datetime type
     raw_data['datetime'] = pd.to_datetime(raw_data['datetime'])
-    raw_data['tournament'] = 0
-    raw_data['division'] = 0
-    raw_data['knockout'] = 0
     # clean competition column
-    for index, row in raw_data.iterrows():
-        competition = row['competition'].lower()
-        if 'round' in competition:
-            if 'round of 16' in competition:
-                raw_data.at[index, 'round'] = 16
-                raw_data.at[index, 'knockout'] = 1
-            else:
-                match = re.search(r'round (\d+)', competition)
-                if match:
-                    raw_data.at[index, 'round'] = int(match.group(1))
-                    raw_data.at[index, 'knockout'] = 1
-
-        # Check for semi-final, quarter-final, and final
-        if 'semi-final' in competition:
-            raw_data.at[index, 'round'] = 'SF'
-            raw_data.at[index, 'knockout'] = 1
-        elif 'quarter-final' in competition:
-            raw_data.at[index, 'round'] = 'QF'
-            raw_data.at[index, 'knockout'] = 1
-        elif 'final' in competition and 'semi' not in competition and 'quarter' not in competition:
-            raw_data.at[index, 'round'] = 'F'
-            raw_data.at[index, 'knockout'] = 1
-        if 'friendly' in competition:
-            raw_data.at[index, 'competition'] = 'friendly'
-            raw_data.at[index, 'division'] = 1
-            raw_data.at[index, 'round'] = 0
-        elif 'qualification' in competition:
-            raw_data.at[index, 'competition'] = 'qualifier'
-            raw_data.at[index, 'division'] = 2
-        elif 'qualifier' in competition:
-            raw_data.at[index, 'competition'] = 'qualifier'
-            raw_data.at[index, 'division'] = 2
-        elif 'nations league' in competition:
-            raw_data.at[index, 'competition'] = 'nations league'
-            raw_data.at[index, 'division'] = 3
-        elif 'euros' in competition:
-            raw_data.at[index, 'competition'] = 'euros'
-            raw_data.at[index, 'tournament'] = 1
-            raw_data.at[index, 'division'] = 4
-        elif 'euro' in competition:
-            raw_data.at[index, 'competition'] = 'euros'
-            raw_data.at[index, 'tournament'] = 1
-            raw_data.at[index, 'division'] = 4
-        elif 'copa america' in competition:
-            raw_data.at[index, 'competition'] = 'copa america'
-            raw_data.at[index, 'tournament'] = 1
-            raw_data.at[index, 'division'] = 5
-        elif 'world cup' in competition:
-            raw_data.at[index, 'competition'] = 'world cup'
-            raw_data.at[index, 'tournament'] = 1
-            raw_data.at[index, 'division'] = 6
+    raw_data = parse_competitions(raw_data)
 
-    with open('data/fixed/team_id_mapping.pkl', 'rb') as f:
-        team_id_mapping = pickle.load(f)
-    raw_data['team_id'] = raw_data['team'].map(team_id_mapping)
-    raw_data['opp_id'] = raw_data['opp'].map(team_id_mapping)
+    raw_data['team_id'] = map_ids(raw_data['team'], 'data/fixed/team_id_mapping.pkl')
+    raw_data['opp_id'] = map_ids(raw_data['opp'], 'data/fixed/team_id_mapping.pkl')
 
-    with open('data/fixed/referee_id_mapping.pkl', 'rb') as f:
-        ref_id_mapping = pickle.load(f)
-    raw_data['referee_id'] = raw_data['referee'].map(ref_id_mapping)
+    raw_data['referee_id'] = map_ids(raw_data['referee'], 'data/fixed/referee_id_mapping.pkl')
+    raw_data['stadium_id'] = map_ids(raw_data['stadium'], 'data/fixed/stadium_id_mapping.pkl')
     return raw_data
 
 stats_cols = [
@@ -163,6 +103,7 @@ cols_not_for_modelling = [
     'latitude',
     'longitude',
     'stadium',
+    'stadium_id',
     'attendance',
     'referee',
     'possession',
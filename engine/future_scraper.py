@@ -1,20 +1,23 @@
-from selenium import webdriver
 from selenium.common import TimeoutException
-from selenium.webdriver.chrome.service import Service
-from webdriver_manager.chrome import ChromeDriverManager
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from bs4 import BeautifulSoup
 import re
 import pandas as pd
+from src.utils.schema import clean_scraped, enforce_schema
+from src.scraper.browser import new_driver
+from src.scraper.http_scraper import http_fixture
 
 
 def scrape_single_match(test_url):
+    # Most fixtures are fully server-rendered, so try without a browser first
+    df = http_fixture(test_url)
+    if df is not None:
+        return df
+
     # Set up WebDriver
-    service = Service(ChromeDriverManager().install())
-    driver = webdriver.Chrome(service=service)
-    driver.maximize_window()
+    driver = new_driver()
 
     # Navigate to the page
     driver.get(test_url)
@@ -102,16 +105,12 @@ def scrape_single_match(test_url):
     driver.quit()
 
     # DATA CLEANING
-    # remove any brackets from df
-    df = df.replace({'\(': '', '\)': ''}, regex=True)
-    # remove any % from df
-    df = df.replace({'%': ''}, regex=True)
-    # fill any empty cells with nan
-    df = df.replace('', pd.NA)
+    # remove brackets, % and # and fill any empty cells with nan
+    df = clean_scraped(df)
 
     # make all column names lowercase and replace spaces with underscores
     df.columns = df.columns.str.lower().str.replace(' ', '_')
-    return df
+    return enforce_schema(df)
 
 
 def extract_attribute_data(driver, class_name_keyword):
@@ -1,8 +1,10 @@
-from engine.tackle_fe import feature_engineering
+from engine.tackle_fe import map_team_ids
+from src.feature_engineering.feature_state import load_feature_state, append_and_featurize, model_features
 from engine.future_scraper import scrape_single_match
 from engine.engine_cleaner import simple_cleaner
 import pandas as pd
 from joblib import load
+from src.utils.schema import enforce_schema
 
 
 # Scrape today's fixtures
@@ -24,29 +26,14 @@ for url in todays_urls:
 # Step 3: Concatenate the dataframes into a single dataframe
 todays_df = pd.concat(dfs, ignore_index=True)
 todays_df = simple_cleaner(todays_df)
-# Load in processed Data
-processed_data = pd.read_csv('data/processed_master_tackles_4.csv')
-# make sure datetime is in datetime format
-processed_data['datetime'] = pd.to_datetime(processed_data['datetime'])
-# Join them
-master_data = pd.concat([processed_data, todays_df], axis=0)
+# Load the feature state saved alongside the tackle model by src/model/tackle_model.py
+feature_state = load_feature_state('data/feature_state_tackles_4.pkl')
 
-# Engineer features
-stats_cols = ['accurate_passes', 'accurate_passes_pc',
-              'fouls_committed', 'corners', 'blocked_shots', 'passes',
-              'passes_own_half', 'passes_opp_half', 'accurate_long_balls', 'accurate_long_balls_pc',
-              'accurate_crosses', 'accurate_crosses_pc', 'throws',
-              'yellow_cards', 'red_cards', 'tackles_won', 'tackles_won_pc', 'interceptions', 'blocks', 'clearances',
-              'duels_won', 'ground_duels_won', 'ground_duels_won_pc', 'aerial_duels_won',
-              'aerial_duels_won_pc', 'successful_dribbles', 'successful_dribbles_pc', 'possession', 'total_tackles']
-# remove all commas from stats_cols
-master_data[stats_cols] = master_data[stats_cols].replace(',', '', regex=True)
-# make all stats_cols float
-master_data[stats_cols] = master_data[stats_cols].astype(float)
-master_data['ranking'] = master_data['ranking'].astype(int)
-master_data['opp_ranking'] = master_data['opp_ranking'].astype(int)
+# give every column its schema dtype
+todays_df = enforce_schema(todays_df)
 
-master_data = feature_engineering(master_data, stats_cols)
+# Featurize today's fixtures from the saved running aggregates instead of rerunning the whole history
+master_data = append_and_featurize(feature_state, map_team_ids(todays_df))
 
 # preprocessing
 # Columns to exclude from modelling
@@ -74,6 +61,8 @@ for col in pred_df.columns:
 pred_df['team_id'] = pred_df['team_id'].astype('category')
 pred_df['opp_id'] = pred_df['opp_id'].astype('category')
 
+# columns get_dummies one-hot encodes; only their dummies may be missing for today's fixtures
+one_hot_cols = pred_df.select_dtypes(include=['object', 'category']).columns.tolist()
 pred_df = pd.get_dummies(pred_df)
 
 # Remove all rows from master data that are not in todays_df, use game_id to identify
@@ -96,10 +85,9 @@ extra_in_model = [f for f in pred_df.columns if f not in tackle_features]
 
 print("Features expected by model and missing in data:", missing_from_model)
 print("Extra features in data not expected by model:", extra_in_model)
-
-
+# one-hot columns for teams not playing today are set to 0; any other missing feature raises
 # throw_df = pred_df[throw_features]
-tackle_df = pred_df[tackle_features]
+tackle_df = model_features(pred_df, tackle_features, one_hot_cols)
 # total_throws_predictions = throw_model.predict(throw_df)
 total_tackle_predictions = tackle_model.predict(tackle_df)
 # todays_df['pred_throws'] = total_throws_predictions
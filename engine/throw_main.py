@@ -1,4 +1,4 @@
-from engine.throw_fe import feature_engineering
+from src.feature_engineering.feature_state import load_feature_state, append_and_featurize, model_features
 from engine.future_scraper import scrape_single_match
 from engine.engine_cleaner import simple_cleaner
 from src.utils.simple_cleaner import cols_not_for_modelling, stats_cols
@@ -6,6 +6,7 @@ import pandas as pd
 from joblib import load
 
 from src.model.model_cleaner import filter_teams, european_countries
+from src.utils.schema import enforce_schema
 
 # Scrape today's fixtures
 todays_urls = ['https://www.fotmob.com/en-GB/matches/canada-vs-argentina/1an224#4407872']
@@ -23,19 +24,14 @@ for url in todays_urls:
 # Step 3: Concatenate the dataframes into a single dataframe
 todays_df = pd.concat(dfs, ignore_index=True)
 todays_df = simple_cleaner(todays_df)
-# Load in processed Data
-processed_data = pd.read_csv('data/processed_master_throws_6.csv')
+# Load the feature state saved alongside the processed master by main.py
+feature_state = load_feature_state('data/feature_state_throws_6.pkl')
 
-processed_data['datetime'] = pd.to_datetime(processed_data['datetime'])
-# Join them
-master_data = pd.concat([processed_data, todays_df], axis=0)
+# give every column its schema dtype
+todays_df = enforce_schema(todays_df)
 
-# make all stats_cols float
-master_data[stats_cols] = master_data[stats_cols].astype(float)
-master_data['ranking'] = master_data['ranking'].astype(int)
-master_data['opp_ranking'] = master_data['opp_ranking'].astype(int)
-
-master_data = feature_engineering(master_data, stats_cols)
+# Featurize today's fixtures from the saved running aggregates instead of rerunning the whole history
+master_data = append_and_featurize(feature_state, todays_df)
 
 # drop columns not for modelling from full_df if they are in full_df
 pred_df = master_data.drop(columns=cols_not_for_modelling, errors='ignore')
@@ -51,6 +47,8 @@ pred_df['stadium'] = pred_df['stadium'].astype('category')
 pred_df['referee'] = pred_df['referee'].astype('category')
 pred_df['round'] = pred_df['round'].astype('category')
 pred_df['competition'] = pred_df['competition'].astype('category')
+# columns get_dummies one-hot encodes; only their dummies may be missing for today's fixtures
+one_hot_cols = pred_df.select_dtypes(include=['object', 'category']).columns.tolist()
 pred_df = pd.get_dummies(pred_df)
 
 # Remove all rows from master data that are not in todays_df, use game_id to identify
@@ -71,9 +69,8 @@ extra_in_model = [f for f in pred_df.columns if f not in throw_features]
 
 print("Features expected by model and missing in data:", missing_from_model)
 print("Extra features in data not expected by model:", extra_in_model)
-
-
-throw_df = pred_df[throw_features]
+# one-hot columns for teams etc. not playing today are set to 0; any other missing feature raises
+throw_df = model_features(pred_df, throw_features, one_hot_cols)
 # print cols with nan values
 print("Columns with nan values:", throw_df.columns[throw_df.isna().any()].tolist())
 total_throws_predictions = throw_model.predict(throw_df)
@@ -2,6 +2,9 @@ import pandas as pd
 from src.utils.simple_cleaner import cleaner, stats_cols
 from src.model.model_cleaner import filter_teams, european_countries
 from src.feature_engineering.simple_fe import feature_engineering
+from src.feature_engineering.pipeline import INTERNATIONAL_THROWS
+from src.feature_engineering.feature_state import build_feature_state, save_feature_state
+from src.utils.storage import read_dataset, write_dataset
 from src.weather_engineering.weather_engineering import weather_engineering
 from src.scraper.international_scraper.int_match_scraper import international_game_scraper
 import matplotlib
@@ -10,7 +13,7 @@ import matplotlib.pyplot as plt
 
 
 # fixed_nan_df = international_game_scraper(scrape_type='full')
-raw_data = pd.read_csv('data/raw/int_raw_master.csv')
+raw_data = read_dataset('int_raw_master')
 euro_data = filter_teams(raw_data, european_countries)
 
 # cols_to_drop1 = ['yellow_cards', 'red_cards', 'tackles_won', 'tackles_won_pc', 'interceptions', 'blocks',
@@ -36,11 +39,12 @@ cleaned_data['tourney_id'] = cleaned_data['competition'] + '_' + cleaned_data['y
 #               'successful_dribbles', 'successful_dribbles_pc', 'possession', 'total_tackles']
 
 # cleaned_data = weather_engineering(cleaned_data, perspective='forecast')
-# make stats_cols numeric
-cleaned_data[stats_cols] = cleaned_data[stats_cols].apply(pd.to_numeric, errors='coerce')
 processed_data = feature_engineering(cleaned_data, stats_cols)
 # save processed data
-processed_data.to_csv('data/processed_master_throws_6.csv', index=False)
+write_dataset(processed_data, 'processed_master_throws_6')
+# snapshot the running aggregates so match-day predictions don't recompute the history
+save_feature_state(build_feature_state(processed_data, stats_cols, INTERNATIONAL_THROWS),
+                   'data/feature_state_throws_6.pkl')
 # print number of nans in every column
 processed_data = processed_data.dropna(subset=stats_cols)
 for col in processed_data.columns:
@@ -1,5 +1,7 @@
-import pandas as pd
+from bisect import bisect_left, insort
+from itertools import product
 import numpy as np
+import pandas as pd
 
 
 # Function to calculate the expected outcome based on the Elo difference
@@ -7,111 +9,312 @@ def expected_outcome(elo_diff):
     return 1 / (1 + 10 ** (-elo_diff / 400))
 
 
-def calculate_elo(latest_results, df, k=20, initial_elo=1500, HFA_initial=100):
-    # Initialize Elo ratings in a dictionary
-    elo_ratings = {}
-    team_first_appearance = {}
-
-    # Initialize Home Field Advantage (HFA)
-    HFA = HFA_initial
-
-    # List to store updated results with Elo ratings
-    updated_results = []
-
-    # Iterate over the latest_results DataFrame row by row
-    for idx, row in latest_results.iterrows():
-        home_team = row['HomeTeam']
-        away_team = row['AwayTeam']
-        home_goals = row['FTHG']
-        away_goals = row['FTAG']
-        match_date = row['DateTime']
-
-        # Check and initialize Elo ratings for home and away teams
-        for team in [home_team, away_team]:
-            if team not in elo_ratings:
-                # Check if this is the first appearance in the season
-                if team not in team_first_appearance:
-                    team_first_appearance[team] = match_date
-
-                # Determine Elo rating for new team based on the 18th ranked team
-                if len(elo_ratings) >= 18:
-                    sorted_elo = sorted(elo_ratings.values(), reverse=True)
-                    team_elo = sorted_elo[17]  # 18th ranked team
-                else:
-                    team_elo = min(elo_ratings.values(), default=initial_elo)
-
-                elo_ratings[team] = team_elo
-
-        # Capture the Elo ratings before the game
-        home_elo_before = elo_ratings[home_team]
-        away_elo_before = elo_ratings[away_team]
-
-        # Calculate the Elo difference including Home Field Advantage (HFA)
-        elo_diff = (home_elo_before + HFA) - away_elo_before
-
-        # Calculate expected results
-        E_home = expected_outcome(elo_diff)
-        E_away = 1 - E_home
-
-        # Determine actual match result
-        if home_goals > away_goals:
-            R_home = 1
-            R_away = 0
-        elif home_goals < away_goals:
-            R_home = 0
-            R_away = 1
-        else:
-            R_home = 0.5
-            R_away = 0.5
-
-        # Calculate Elo change based on result and goal difference
-        goal_diff = abs(home_goals - away_goals)
-        delta_elo_margin = k * (R_home - E_home) * np.sqrt(goal_diff) if goal_diff > 0 else k * (R_home - E_home)
-
-        # Update Elo ratings after the match
-        elo_ratings[home_team] += delta_elo_margin
-        elo_ratings[away_team] -= delta_elo_margin
+def match_results(home_goals, away_goals, margin_exponent=0.5):
+    """
+    Actual home result and goal-difference multiplier of every match.
+
+    Args:
+        home_goals: Array of home goals.
+        away_goals: Array of away goals.
+        margin_exponent: Power of the goal difference that scales the rating change.
+
+    Returns:
+        Tuple of (home result: 1 win, 0.5 draw, 0 loss; goal difference ** margin_exponent, or 1 for a draw).
+    """
+    home_goals = np.asarray(home_goals, dtype=float)
+    away_goals = np.asarray(away_goals, dtype=float)
+    results = np.where(home_goals > away_goals, 1.0, np.where(home_goals < away_goals, 0.0, 0.5))
+    goal_diff = np.abs(home_goals - away_goals)
+    margins = np.where(goal_diff > 0, goal_diff, 1.0) ** margin_exponent
+    return results, margins
+
+
+def seed_rating(sorted_ratings, seed_rank, initial_elo):
+    """Rating for a team's first appearance: the seed_rank-th best current rating, else the lowest."""
+    if len(sorted_ratings) >= seed_rank:
+        return sorted_ratings[-seed_rank]
+    return sorted_ratings[0] if sorted_ratings else initial_elo
+
+
+def replace_rating(sorted_ratings, old, new):
+    """Move one rating within the sorted list of ratings (binary search + insort)."""
+    del sorted_ratings[bisect_left(sorted_ratings, old)]
+    insort(sorted_ratings, new)
+
+
+def replay_elo(home, away, home_goals, away_goals, k=20, initial_elo=1500, HFA_initial=100, seed_rank=18,
+               drift=0.075, margin_exponent=0.5, ratings=None, HFA=None):
+    """
+    Replay Elo ratings over a sequence of matches between integer-encoded teams.
+
+    Ratings live in a list indexed by team code, with a sorted copy of every rated team's rating kept
+    alongside, so seeding a promoted team at the seed_rank-th best rating is an index into the sorted list
+    instead of re-sorting every rating.
+
+    Args:
+        home: Array of home team codes (0..n_teams-1), in match order.
+        away: Array of away team codes.
+        home_goals: Array of home goals.
+        away_goals: Array of away goals.
+        k: Elo K-factor.
+        initial_elo: Rating of the first teams when fewer than seed_rank are rated.
+        HFA_initial: Initial home field advantage, which drifts with every result.
+        seed_rank: Rank of the rating given to a team on its first appearance.
+        drift: Share of each rating change added to the home field advantage.
+        margin_exponent: Power of the goal difference that scales the rating change.
+        ratings: Optional ratings by team code to warm-start from (NaN for teams not rated yet).
+        HFA: Optional home field advantage to warm-start from (default HFA_initial).
+
+    Returns:
+        Tuple of (home pre-match ratings, away pre-match ratings, final ratings by team code (NaN if unseen),
+        final HFA).
+    """
+    results, margins = match_results(home_goals, away_goals, margin_exponent)
+    home, away = np.asarray(home).tolist(), np.asarray(away).tolist()
+    n_teams = max(home + away + [len(ratings) - 1 if ratings is not None else -1]) + 1
+
+    # Plain lists keep the per-match Python loop fast
+    previous = [] if ratings is None else [None if np.isnan(rating) else rating for rating in ratings.tolist()]
+    ratings = previous + [None] * (n_teams - len(previous))
+    sorted_ratings = sorted(rating for rating in ratings if rating is not None)
+    home_before = [0.0] * len(home)
+    away_before = [0.0] * len(home)
+    HFA = HFA_initial if HFA is None else HFA
+
+    for i, (home_team, away_team, result, margin) in enumerate(zip(home, away, results.tolist(),
+                                                                      margins.tolist())):
+        for team in (home_team, away_team):
+            if ratings[team] is None:
+                ratings[team] = seed_rating(sorted_ratings, seed_rank, initial_elo)
+                insort(sorted_ratings, ratings[team])
+
+        home_elo, away_elo = ratings[home_team], ratings[away_team]
+        home_before[i], away_before[i] = home_elo, away_elo
+
+        delta_elo_margin = k * (result - expected_outcome(home_elo + HFA - away_elo)) * margin
+        ratings[home_team] = home_elo + delta_elo_margin
+        ratings[away_team] = away_elo - delta_elo_margin
+        replace_rating(sorted_ratings, home_elo, ratings[home_team])
+        replace_rating(sorted_ratings, away_elo, ratings[away_team])
 
         # Adjust Home Field Advantage (HFA)
-        HFA += delta_elo_margin * 0.075
-
-        # Store pre-game Elo ratings in the latest_results DataFrame
-        row['home_elo'] = home_elo_before
-        row['away_elo'] = away_elo_before
-        updated_results.append(row)
-
-    # Convert the updated results back to a DataFrame
-    updated_results_df = pd.DataFrame(updated_results)
-
-    # First merge: team = HomeTeam, opp = AwayTeam
-    df = df.merge(
-        updated_results_df[['DateTime', 'HomeTeam', 'AwayTeam', 'home_elo', 'away_elo']],
-        how='left',
-        left_on=['datetime', 'team', 'opp'],
-        right_on=['DateTime', 'HomeTeam', 'AwayTeam']
-    )
+        HFA += delta_elo_margin * drift
+
+    final = np.array([np.nan if rating is None else rating for rating in ratings])
+    return np.array(home_before), np.array(away_before), final, HFA
+
+
+def seed_ratings(ratings, rated, seed_rank, initial_elo):
+    """Row-wise seed_rating for a (settings x teams) rating matrix; rated flags the teams seen so far."""
+    if not rated.any():
+        return np.full(len(ratings), float(initial_elo))
+    current = np.sort(ratings[:, rated], axis=1)
+    return current[:, -seed_rank] if current.shape[1] >= seed_rank else current[:, 0]
+
+
+def sweep_elo(latest_results, k=(20,), HFA_initial=(100,), drift=(0.075,), margin_exponent=(0.5,),
+              initial_elo=1500, seed_rank=18, burn_in=0):
+    """
+    Replay the results history for a whole grid of Elo settings at once and score each one.
+
+    Every combination of the given values is a row of a (settings x teams) rating matrix, so a single pass
+    over the matches updates all of them with vector operations. Each setting is scored on its pre-match
+    home expectation against the actual result (draws count as 0.5).
+
+    Args:
+        latest_results: Results history (HomeTeam, AwayTeam, FTHG, FTAG) sorted by DateTime.
+        k: K-factors to try.
+        HFA_initial: Initial home field advantages to try.
+        drift: Home field advantage drift rates to try.
+        margin_exponent: Goal-difference exponents to try (0.5 is the sqrt used by calculate_elo).
+        initial_elo: Rating of the first teams rated.
+        seed_rank: Rank of the rating given to a team on its first appearance.
+        burn_in: Number of early matches to leave out of the scores while ratings settle.
+
+    Returns:
+        DataFrame with one row per setting: k, HFA_initial, drift, margin_exponent, log_loss and brier,
+        sorted by log_loss.
+    """
+    grid = pd.DataFrame(list(product(k, HFA_initial, drift, margin_exponent)),
+                        columns=['k', 'HFA_initial', 'drift', 'margin_exponent'])
+    ks, drifts = grid['k'].to_numpy(dtype=float), grid['drift'].to_numpy(dtype=float)
+    HFA = grid['HFA_initial'].to_numpy(dtype=float)
+
+    home, away, labels = encode_teams(latest_results)
+    results, _ = match_results(latest_results['FTHG'], latest_results['FTAG'])
+    goal_diff = np.abs(latest_results['FTHG'].to_numpy(dtype=float) - latest_results['FTAG'].to_numpy(dtype=float))
+    # (matches x settings) goal-difference multipliers
+    margins = np.where(goal_diff > 0, goal_diff, 1.0)[:, None] ** grid['margin_exponent'].to_numpy(dtype=float)
 
-    # Rename the columns from the first merge to avoid conflicts in the second merge
-    df.rename(columns={'home_elo': 'team_elo_home_perspective', 'away_elo': 'opp_elo_home_perspective'}, inplace=True)
+    ratings = np.zeros((len(grid), len(labels)))
+    rated = np.zeros(len(labels), dtype=bool)
+    log_loss = np.zeros(len(grid))
+    brier = np.zeros(len(grid))
 
-    # Second merge: team = AwayTeam, opp = HomeTeam
-    df = df.merge(
-        updated_results_df[['DateTime', 'HomeTeam', 'AwayTeam', 'home_elo', 'away_elo']],
-        how='left',
-        left_on=['datetime', 'team', 'opp'],
-        right_on=['DateTime', 'AwayTeam', 'HomeTeam']
+    for i, (home_team, away_team) in enumerate(zip(home.tolist(), away.tolist())):
+        for team in (home_team, away_team):
+            if not rated[team]:
+                ratings[:, team] = seed_ratings(ratings, rated, seed_rank, initial_elo)
+                rated[team] = True
+
+        expected = expected_outcome(ratings[:, home_team] + HFA - ratings[:, away_team])
+        if i >= burn_in:
+            clipped = np.clip(expected, 1e-15, 1 - 1e-15)
+            log_loss -= results[i] * np.log(clipped) + (1 - results[i]) * np.log(1 - clipped)
+            brier += (expected - results[i]) ** 2
+
+        delta_elo_margin = ks * (results[i] - expected) * margins[i]
+        ratings[:, home_team] += delta_elo_margin
+        ratings[:, away_team] -= delta_elo_margin
+        HFA += delta_elo_margin * drifts
+
+    scored = max(len(home) - burn_in, 1)
+    grid['log_loss'] = log_loss / scored
+    grid['brier'] = brier / scored
+    return grid.sort_values('log_loss', kind='stable').reset_index(drop=True)
+
+
+def encode_teams(latest_results, labels=()):
+    """
+    Integer-encode HomeTeam/AwayTeam in order of first appearance.
+
+    Args:
+        latest_results: Results with HomeTeam and AwayTeam columns.
+        labels: Teams already encoded (e.g. a rating state's labels); they keep their codes.
+
+    Returns:
+        Tuple of (home codes, away codes, list of team labels by code).
+    """
+    names = np.column_stack([latest_results['HomeTeam'].to_numpy(), latest_results['AwayTeam'].to_numpy()])
+    uniques = pd.unique(names.ravel())
+    known = pd.Index(list(labels), dtype=object)
+    labels = known.append(pd.Index(uniques[known.get_indexer(uniques) < 0], dtype=object))
+    codes = labels.get_indexer(names.ravel()).reshape(-1, 2)
+    return codes[:, 0], codes[:, 1], labels.tolist()
+
+
+def check_new_results(state, latest_results):
+    """Raise if warm-starting a rating state with results that are not after its last result."""
+    if state['last_datetime'] is not None and len(latest_results) and (
+            pd.to_datetime(latest_results['DateTime'], utc=True) <= state['last_datetime']).any():
+        raise ValueError("New results must come after the last result in the rating state; "
+                         "replay the full history instead")
+
+
+def new_elo_state(k=20, initial_elo=1500, HFA_initial=100, seed_rank=18, drift=0.075, margin_exponent=0.5):
+    """Empty Elo state (a picklable dict) for update_elo to advance over results."""
+    return {
+        'params': {'k': k, 'initial_elo': initial_elo, 'HFA_initial': HFA_initial, 'seed_rank': seed_rank,
+                   'drift': drift, 'margin_exponent': margin_exponent},
+        'labels': [],
+        'ratings': np.zeros(0),
+        'HFA': HFA_initial,
+        'last_datetime': None,
+    }
+
+
+def update_elo(state, latest_results):
+    """
+    Advance an Elo state over new results, in place.
+
+    Args:
+        state: State from new_elo_state (or a saved one) whose last result is before latest_results.
+        latest_results: Results (HomeTeam, AwayTeam, FTHG, FTAG, DateTime) sorted by DateTime.
+
+    Returns:
+        Tuple of (home pre-match ratings, away pre-match ratings) aligned with latest_results.
+    """
+    check_new_results(state, latest_results)
+    home, away, labels = encode_teams(latest_results, state['labels'])
+    home_elo, away_elo, ratings, HFA = replay_elo(home, away, latest_results['FTHG'], latest_results['FTAG'],
+                                                  ratings=state['ratings'], HFA=state['HFA'], **state['params'])
+    state.update(labels=labels, ratings=ratings, HFA=HFA)
+    if len(latest_results):
+        state['last_datetime'] = pd.to_datetime(latest_results['DateTime'], utc=True).max()
+    return home_elo, away_elo
+
+
+def game_keys(*frames):
+    """
+    Integer key of each match, shared across frames.
+
+    A match is identified by its UTC calendar day and the pair of teams in either order, so the same game
+    gets the same key from a results row (HomeTeam, AwayTeam) and from both of its team-perspective rows,
+    even when the sources' kickoff timestamps differ.
+
+    Args:
+        *frames: Tuples of (datetimes, teams, opponents) array-likes.
+
+    Returns:
+        List with one int64 key array per frame.
+    """
+    parts = []
+    for datetimes, teams, opps in frames:
+        teams, opps = np.asarray(teams, dtype=object), np.asarray(opps, dtype=object)
+        parts.append(pd.DataFrame({
+            'day': pd.to_datetime(pd.Series(np.asarray(datetimes)), utc=True).dt.normalize(),
+            'first': np.where(teams <= opps, teams, opps),
+            'second': np.where(teams <= opps, opps, teams),
+        }))
+    keys = pd.concat(parts, ignore_index=True).groupby(['day', 'first', 'second'], sort=False,
+                                                       dropna=False).ngroup().to_numpy(dtype=np.int64)
+    return np.split(keys, np.cumsum([len(part) for part in parts])[:-1])
+
+
+def perspective_table(game_key, home_teams, away_teams, values):
+    """
+    Long-format (game_key, team) table with one row per team per match.
+
+    Args:
+        game_key: Array of match keys from game_keys.
+        home_teams: Array of home teams.
+        away_teams: Array of away teams.
+        values: Dict of name -> (home values, away values); each adds team_{name} and opp_{name} columns.
+
+    Returns:
+        DataFrame keyed by (game_key, team).
+    """
+    table = {
+        'game_key': np.concatenate([game_key, game_key]),
+        'team': np.concatenate([np.asarray(home_teams, dtype=object), np.asarray(away_teams, dtype=object)]),
+    }
+    for name, (home_values, away_values) in values.items():
+        table[f'team_{name}'] = np.concatenate([home_values, away_values])
+        table[f'opp_{name}'] = np.concatenate([away_values, home_values])
+    return pd.DataFrame(table).drop_duplicates(subset=['game_key', 'team'])
+
+
+def join_perspectives(latest_results, df, values):
+    """Join per-match home/away values from latest_results onto df's (team, opp) rows in a single merge."""
+    results_key, df_key = game_keys(
+        (latest_results['DateTime'], latest_results['HomeTeam'], latest_results['AwayTeam']),
+        (df['datetime'], df['team'], df['opp']),
     )
+    table = perspective_table(results_key, latest_results['HomeTeam'], latest_results['AwayTeam'], values)
+
+    # One join of the match rows onto the (game, team) table covers both home and away perspectives
+    df = df.assign(game_key=df_key).merge(table, on=['game_key', 'team'], how='left', validate='many_to_one')
+    return df.drop(columns=['game_key'])
 
-    # Rename the columns from the second merge to distinguish them
-    df.rename(columns={'home_elo': 'opp_elo_away_perspective', 'away_elo': 'team_elo_away_perspective'}, inplace=True)
 
-    # Combine the two perspectives to create the final 'team_elo_before' and 'opp_elo_before'
-    df['team_elo'] = df['team_elo_home_perspective'].combine_first(df['team_elo_away_perspective'])
-    df['opp_elo'] = df['opp_elo_home_perspective'].combine_first(df['opp_elo_away_perspective'])
+def calculate_elo(latest_results, df, k=20, initial_elo=1500, HFA_initial=100, state=None):
+    """
+    Add each team's and opponent's pre-match Elo rating to the match data.
 
-    # Drop the intermediate columns used for merging
-    df.drop(columns=['team_elo_home_perspective', 'opp_elo_home_perspective', 'team_elo_away_perspective',
-                     'opp_elo_away_perspective', 'DateTime_x', 'HomeTeam_x', 'AwayTeam_x', 'DateTime_y', 'HomeTeam_y',
-                     'AwayTeam_y'], inplace=True)
+    Args:
+        latest_results: Results history (HomeTeam, AwayTeam, FTHG, FTAG, DateTime) sorted by DateTime.
+        df: The DataFrame containing match data (datetime, team, opp).
+        k: Elo K-factor.
+        initial_elo: Rating of the first teams rated.
+        HFA_initial: Initial home field advantage.
+        state: Optional Elo state to warm-start from; latest_results then only needs the newer results, and
+            the state is advanced in place.
 
-    return df, elo_ratings
+    Returns:
+        Tuple of (df with team_elo and opp_elo, dict of final ratings by team).
+    """
+    if state is None:
+        state = new_elo_state(k=k, initial_elo=initial_elo, HFA_initial=HFA_initial)
+    home_elo, away_elo = update_elo(state, latest_results)
+    df = join_perspectives(latest_results, df, {'elo': (home_elo, away_elo)})
+    return df, dict(zip(state['labels'], state['ratings'].tolist()))
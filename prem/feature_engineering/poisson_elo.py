@@ -1,82 +1,146 @@
-import pandas as pd
 import numpy as np
-
-# Load your dataset
-# latest_results = pd.read_csv('path_to_your_file.csv')
-
-# Sample DataFrame creation for demonstration
-latest_results = pd.DataFrame({
-    'HomeTeam': ['TeamA', 'TeamB', 'TeamC'],
-    'AwayTeam': ['TeamD', 'TeamE', 'TeamF'],
-    'FTHG': [3, 1, 2],  # Full-Time Home Goals
-    'FTAG': [1, 1, 1],  # Full-Time Away Goals
-    'DateTime': pd.to_datetime(['2023-01-01', '2023-01-02', '2023-01-03'])
-})
-
-# Initialize Elo ratings
-elo_ratings = {team: 1500 for team in pd.concat([latest_results['HomeTeam'], latest_results['AwayTeam']]).unique()}
-
-# Home Field Advantage (HFA) initialization
-HFA = 100  # You can start with an initial value
-
-
-# Function to calculate expected outcome
-def expected_outcome(elo_diff):
-    return 1 / (1 + 10 ** (-elo_diff / 400))
-
-
-# Update Elo ratings after each match
-k = 20  # K-factor as per your description
-
-# Track Tilt
-tilt = {team: 1.0 for team in elo_ratings}
-
-for idx, row in latest_results.iterrows():
-    home_team = row['HomeTeam']
-    away_team = row['AwayTeam']
-    home_goals = row['FTHG']
-    away_goals = row['FTAG']
-
-    # Calculate goal difference
-    goal_diff = abs(home_goals - away_goals)
-
-    # Calculate Elo difference (including HFA)
-    elo_diff = (elo_ratings[home_team] + HFA) - elo_ratings[away_team]
-
-    # Expected results
-    E_home = expected_outcome(elo_diff)
-    E_away = 1 - E_home
-
-    # Actual results
-    if home_goals > away_goals:
-        R_home = 1
-        R_away = 0
-    elif home_goals < away_goals:
-        R_home = 0
-        R_away = 1
-    else:
-        R_home = 0.5
-        R_away = 0.5
-
-    # Weighting by goal difference
-    if goal_diff > 0:
-        delta_elo_margin = k * (R_home - E_home) * np.sqrt(goal_diff)
-    else:
-        delta_elo_margin = 0
-
-    # Update Elo ratings
-    elo_ratings[home_team] += delta_elo_margin
-    elo_ratings[away_team] -= delta_elo_margin
-
-    # Update Tilt
-    game_total_goals = home_goals + away_goals
-    expected_goals = 2.5  # A typical expected goal total, can be adjusted
-    tilt[home_team] = 0.98 * tilt[home_team] + 0.02 * game_total_goals / tilt[away_team] / expected_goals
-    tilt[away_team] = 0.98 * tilt[away_team] + 0.02 * game_total_goals / tilt[home_team] / expected_goals
-
-    # Adjust Home Field Advantage (HFA)
-    HFA += delta_elo_margin * 0.075
-
-# Print final Elo ratings and Tilt
-print("Final Elo Ratings:", elo_ratings)
-print("Final Tilt:", tilt)
+import pandas as pd
+from prem.feature_engineering.elo import (expected_outcome, match_results, encode_teams, check_new_results,
+                                          join_perspectives)
+
+
+def new_tilt_state(k=20, initial_elo=1500, HFA_initial=100, drift=0.075, tilt_decay=0.98, expected_goals=2.5,
+                   initial_tilt=1.0):
+    """Empty Elo-with-tilt state (a picklable dict) for update_tilt to advance over results."""
+    return {
+        'params': {'k': k, 'drift': drift, 'tilt_decay': tilt_decay, 'expected_goals': expected_goals},
+        'initial_elo': initial_elo,
+        'initial_tilt': initial_tilt,
+        'labels': [],
+        'ratings': np.zeros(0),
+        'tilt': np.zeros(0),
+        'HFA': HFA_initial,
+        'last_datetime': None,
+    }
+
+
+def replay_tilt(home, away, home_goals, away_goals, ratings, tilt, HFA, k=20, drift=0.075, tilt_decay=0.98,
+                expected_goals=2.5):
+    """
+    Replay Elo ratings and goal tilt over a sequence of matches between integer-encoded teams.
+
+    Tilt tracks how many goals a team's games produce relative to expected_goals, adjusted for the
+    opponent's tilt, as an exponentially weighted average. Unlike calculate_elo, every team starts from the
+    given ratings and a draw leaves the ratings unchanged.
+
+    Args:
+        home: Array of home team codes, in match order.
+        away: Array of away team codes.
+        home_goals: Array of home goals.
+        away_goals: Array of away goals.
+        ratings: Starting Elo ratings by team code.
+        tilt: Starting tilt by team code.
+        HFA: Starting home field advantage.
+        k: Elo K-factor.
+        drift: Share of each rating change added to the home field advantage.
+        tilt_decay: Weight of a team's previous tilt in each update.
+        expected_goals: Typical total goals in a game.
+
+    Returns:
+        Tuple of (home pre-match ratings, away pre-match ratings, home pre-match tilt, away pre-match tilt,
+        final ratings, final tilt, final HFA).
+    """
+    results, _ = match_results(home_goals, away_goals)
+    home_goals = np.asarray(home_goals, dtype=float)
+    away_goals = np.asarray(away_goals, dtype=float)
+    goal_diff = np.abs(home_goals - away_goals)
+    margins = np.sqrt(np.where(goal_diff > 0, goal_diff, 0.0))
+    total_goals = home_goals + away_goals
+
+    # Plain lists keep the per-match Python loop fast
+    ratings, tilt = ratings.tolist(), tilt.tolist()
+    before = [[0.0] * len(home) for _ in range(4)]
+    rows = zip(np.asarray(home).tolist(), np.asarray(away).tolist(), results.tolist(), margins.tolist(),
+               total_goals.tolist())
+
+    for i, (home_team, away_team, result, margin, game_total_goals) in enumerate(rows):
+        home_elo, away_elo = ratings[home_team], ratings[away_team]
+        before[0][i], before[1][i] = home_elo, away_elo
+        before[2][i], before[3][i] = tilt[home_team], tilt[away_team]
+
+        # Weighting by goal difference (a draw moves nothing)
+        delta_elo_margin = k * (result - expected_outcome(home_elo + HFA - away_elo)) * margin
+        ratings[home_team] = home_elo + delta_elo_margin
+        ratings[away_team] = away_elo - delta_elo_margin
+
+        # Update Tilt (the away side sees the home side's updated tilt)
+        tilt[home_team] = (tilt_decay * tilt[home_team] +
+                           (1 - tilt_decay) * game_total_goals / tilt[away_team] / expected_goals)
+        tilt[away_team] = (tilt_decay * tilt[away_team] +
+                           (1 - tilt_decay) * game_total_goals / tilt[home_team] / expected_goals)
+
+        # Adjust Home Field Advantage (HFA)
+        HFA += delta_elo_margin * drift
+
+    return (*(np.array(values) for values in before), np.array(ratings), np.array(tilt), HFA)
+
+
+def update_tilt(state, latest_results):
+    """
+    Advance an Elo-with-tilt state over new results, in place.
+
+    Args:
+        state: State from new_tilt_state (or a saved one) whose last result is before latest_results.
+        latest_results: Results (HomeTeam, AwayTeam, FTHG, FTAG, DateTime) sorted by DateTime.
+
+    Returns:
+        Tuple of (home pre-match ratings, away pre-match ratings, home pre-match tilt, away pre-match tilt)
+        aligned with latest_results.
+    """
+    check_new_results(state, latest_results)
+    home, away, labels = encode_teams(latest_results, state['labels'])
+    new_teams = len(labels) - len(state['labels'])
+    ratings = np.concatenate([state['ratings'], np.full(new_teams, float(state['initial_elo']))])
+    tilt = np.concatenate([state['tilt'], np.full(new_teams, float(state['initial_tilt']))])
+
+    *before, ratings, tilt, HFA = replay_tilt(home, away, latest_results['FTHG'], latest_results['FTAG'],
+                                              ratings, tilt, state['HFA'], **state['params'])
+    state.update(labels=labels, ratings=ratings, tilt=tilt, HFA=HFA)
+    if len(latest_results):
+        state['last_datetime'] = pd.to_datetime(latest_results['DateTime'], utc=True).max()
+    return tuple(before)
+
+
+def calculate_tilt(latest_results, df, k=20, initial_elo=1500, HFA_initial=100, state=None):
+    """
+    Add each team's and opponent's pre-match goal tilt to the match data.
+
+    Args:
+        latest_results: Results history (HomeTeam, AwayTeam, FTHG, FTAG, DateTime) sorted by DateTime.
+        df: The DataFrame containing match data (datetime, team, opp).
+        k: Elo K-factor.
+        initial_elo: Starting rating of every team.
+        HFA_initial: Initial home field advantage.
+        state: Optional tilt state to warm-start from; latest_results then only needs the newer results, and
+            the state is advanced in place.
+
+    Returns:
+        Tuple of (df with team_tilt and opp_tilt, dict of final tilt by team).
+    """
+    if state is None:
+        state = new_tilt_state(k=k, initial_elo=initial_elo, HFA_initial=HFA_initial)
+    home_elo, away_elo, home_tilt, away_tilt = update_tilt(state, latest_results)
+    df = join_perspectives(latest_results, df, {'tilt': (home_tilt, away_tilt)})
+    return df, dict(zip(state['labels'], state['tilt'].tolist()))
+
+
+if __name__ == '__main__':
+    # Sample DataFrame creation for demonstration
+    latest_results = pd.DataFrame({
+        'HomeTeam': ['TeamA', 'TeamB', 'TeamC'],
+        'AwayTeam': ['TeamD', 'TeamE', 'TeamF'],
+        'FTHG': [3, 1, 2],  # Full-Time Home Goals
+        'FTAG': [1, 1, 1],  # Full-Time Away Goals
+        'DateTime': pd.to_datetime(['2023-01-01', '2023-01-02', '2023-01-03'])
+    })
+    state = new_tilt_state()
+    update_tilt(state, latest_results)
+
+    # Print final Elo ratings and Tilt
+    print("Final Elo Ratings:", dict(zip(state['labels'], state['ratings'].tolist())))
+    print("Final Tilt:", dict(zip(state['labels'], state['tilt'].tolist())))
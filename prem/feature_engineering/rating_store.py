@@ -0,0 +1,157 @@
+import os
+import pickle
+import numpy as np
+import pandas as pd
+from prem.feature_engineering.elo import new_elo_state, update_elo, seed_rating
+from prem.feature_engineering.poisson_elo import new_tilt_state, update_tilt
+
+
+def new_rating_store():
+    """
+    Empty ratings store: the running Elo and tilt states plus a checkpoint after every matchday.
+
+    Checkpoints are (matchdays x teams) arrays indexed by the sorted UTC matchday, with team columns in the
+    order the states first saw them (NaN before a team's first game). seeds keeps the Elo each team was
+    seeded with for its first game.
+    """
+    return {
+        'elo_state': new_elo_state(),
+        'tilt_state': new_tilt_state(),
+        'days': np.array([], dtype='datetime64[ns]'),
+        'elo': np.zeros((0, 0)),
+        'tilt': np.zeros((0, 0)),
+        'HFA': np.zeros(0),
+        'seeds': {},
+    }
+
+
+def checkpoint_rows(rows, width):
+    """Stack checkpoint rows into an array, padding early rows (fewer teams known) with NaN."""
+    padded = np.full((len(rows), width), np.nan)
+    for idx, row in enumerate(rows):
+        padded[idx, :len(row)] = row
+    return padded
+
+
+def extend_checkpoints(existing, rows, width):
+    return np.vstack([checkpoint_rows(existing, width), checkpoint_rows(rows, width)])
+
+
+def update_rating_store(store, latest_results):
+    """
+    Apply new results to a ratings store matchday by matchday, checkpointing after each one (in place).
+
+    Args:
+        store: Store from new_rating_store or load_rating_store.
+        latest_results: Results (HomeTeam, AwayTeam, FTHG, FTAG, DateTime) after the store's last result.
+
+    Returns:
+        The store.
+    """
+    results = latest_results.sort_values(by='DateTime', kind='stable')
+    results_days = pd.to_datetime(results['DateTime'], utc=True).dt.normalize()
+
+    days, elo_rows, tilt_rows, HFA = [], [], [], []
+    for day, matchday in results.groupby(results_days.to_numpy(), sort=True):
+        home_elo, away_elo = update_elo(store['elo_state'], matchday)
+        for team, rating in zip(np.concatenate([matchday['HomeTeam'], matchday['AwayTeam']]).tolist(),
+                                np.concatenate([home_elo, away_elo]).tolist()):
+            store['seeds'].setdefault(team, rating)
+        update_tilt(store['tilt_state'], matchday)
+        days.append(day)
+        elo_rows.append(store['elo_state']['ratings'].copy())
+        tilt_rows.append(store['tilt_state']['tilt'].copy())
+        HFA.append(store['elo_state']['HFA'])
+
+    # Both states encode teams in order of first appearance in the same results, so their columns line up
+    width = len(store['elo_state']['labels'])
+    days = pd.DatetimeIndex(days).tz_localize(None).to_numpy(dtype='datetime64[ns]')
+    store['days'] = np.concatenate([store['days'], days])
+    store['elo'] = extend_checkpoints(store['elo'], elo_rows, width)
+    store['tilt'] = extend_checkpoints(store['tilt'], tilt_rows, width)
+    store['HFA'] = np.concatenate([store['HFA'], HFA])
+    return store
+
+
+def ratings_before(store, teams, datetimes, kind='elo'):
+    """
+    Point-in-time lookup of each team's rating before the given dates.
+
+    A binary search over the matchday index finds the checkpoint after the last matchday strictly before
+    each date, so a team's rating before a game is its rating after its previous game.
+
+    Args:
+        store: Ratings store.
+        teams: Array-like of team names.
+        datetimes: Array-like of datetimes.
+        kind: 'elo' or 'tilt'.
+
+    Returns:
+        float array aligned with teams. Teams without an earlier game get the rating they start from: the
+        Elo they were seeded with, else (a team not in the store yet) the seed_rank-th best Elo at that
+        checkpoint; the initial tilt.
+    """
+    days = pd.to_datetime(pd.Series(np.asarray(datetimes)), utc=True).dt.normalize().dt.tz_localize(None)
+    checkpoint = np.searchsorted(store['days'], days.to_numpy(dtype='datetime64[ns]'), side='left') - 1
+    columns = pd.Index(store['elo_state']['labels'], dtype=object).get_indexer(np.asarray(teams, dtype=object))
+    found = (checkpoint >= 0) & (columns >= 0)
+
+    ratings = np.full(len(columns), np.nan)
+    ratings[found] = store[kind][checkpoint[found], columns[found]]
+
+    unrated = np.isnan(ratings)
+    if kind == 'elo':
+        seeds = pd.Series(np.asarray(teams, dtype=object)[unrated]).map(store['seeds']).to_numpy(dtype=float)
+        ratings[unrated] = seeds
+        unrated = np.isnan(ratings)
+    for idx in np.unique(checkpoint[unrated]).tolist():
+        ratings[unrated & (checkpoint == idx)] = seed_value(store, idx, kind)
+    return ratings
+
+
+def seed_value(store, checkpoint, kind):
+    """Rating a team first seen after the given checkpoint (-1 for none) starts from."""
+    if kind == 'tilt':
+        return store['tilt_state']['initial_tilt']
+    params = store['elo_state']['params']
+    current = store['elo'][checkpoint] if checkpoint >= 0 else np.zeros(0)
+    return seed_rating(sorted(current[~np.isnan(current)].tolist()), params['seed_rank'], params['initial_elo'])
+
+
+def add_rating_features(store, df):
+    """Add pre-match team_elo, opp_elo, team_tilt and opp_tilt to df's (datetime, team, opp) rows."""
+    for kind in ['elo', 'tilt']:
+        df[f'team_{kind}'] = ratings_before(store, df['team'], df['datetime'], kind)
+        df[f'opp_{kind}'] = ratings_before(store, df['opp'], df['datetime'], kind)
+    return df
+
+
+def save_rating_store(store, path):
+    with open(path, 'wb') as f:
+        pickle.dump(store, f)
+
+
+def load_rating_store(path):
+    with open(path, 'rb') as f:
+        return pickle.load(f)
+
+
+def refresh_rating_store(path, latest_results):
+    """
+    Load the saved ratings store (or start one), apply only the results after its last checkpoint and save it.
+
+    Args:
+        path: Path of the pickled store.
+        latest_results: Results history; rows up to the store's last result are skipped.
+
+    Returns:
+        The up-to-date store.
+    """
+    store = load_rating_store(path) if os.path.exists(path) else new_rating_store()
+    last_datetime = store['elo_state']['last_datetime']
+    if last_datetime is not None:
+        latest_results = latest_results[pd.to_datetime(latest_results['DateTime'], utc=True) > last_datetime]
+    if len(latest_results):
+        update_rating_store(store, latest_results)
+        save_rating_store(store, path)
+    return store
@@ -1,10 +1,11 @@
-from engine.throw_fe import feature_engineering
+from src.feature_engineering.feature_state import load_feature_state, append_and_featurize, model_features
 from engine.future_scraper import scrape_single_match
-from engine.throws.copa.copa_throw_pred_cleaner import simple_cleaner, stats_cols, cols_not_for_modelling
+from engine.throws.copa.copa_throw_pred_cleaner import simple_cleaner, cols_not_for_modelling
 import pandas as pd
 from joblib import load
 
 from src.models.model_cleaner import filter_teams, european_countries
+from src.utils.schema import enforce_schema
 
 # Scrape today's fixtures
 todays_urls = ['https://www.fotmob.com/en-GB/matches/uruguay-vs-colombia/1mt1jb#4407873']
@@ -22,19 +23,14 @@ for url in todays_urls:
 # Step 3: Concatenate the dataframes into a single dataframe
 todays_df = pd.concat(dfs, ignore_index=True)
 todays_df = simple_cleaner(todays_df)
-# Load in processed Data
-processed_data = pd.read_csv('data/int_processed_master.csv')
+# Load the feature state saved alongside the processed master by copa_pre_processor.py
+feature_state = load_feature_state('data/feature_state_int.pkl')
 
-processed_data['datetime'] = pd.to_datetime(processed_data['datetime'])
-# Join them
-master_data = pd.concat([processed_data, todays_df], axis=0)
+# give every column its schema dtype
+todays_df = enforce_schema(todays_df)
 
-# make all stats_cols float
-master_data[stats_cols] = master_data[stats_cols].astype(float)
-master_data['ranking'] = master_data['ranking'].astype(int)
-master_data['opp_ranking'] = master_data['opp_ranking'].astype(int)
-
-master_data = feature_engineering(master_data, stats_cols)
+# Featurize today's fixtures from the running aggregates instead of rerunning the whole history
+master_data = append_and_featurize(feature_state, todays_df)
 
 # drop columns not for modelling from full_df if they are in full_df
 pred_df = master_data.drop(columns=cols_not_for_modelling, errors='ignore')
@@ -49,6 +45,8 @@ pred_df['opp_id'] = pred_df['opp_id'].astype('category')
 pred_df['referee_id'] = pred_df['referee_id'].astype('category')
 pred_df['round'] = pred_df['round'].astype('category')
 pred_df['division'] = pred_df['division'].astype('category')
+# columns get_dummies one-hot encodes; only their dummies may be missing for today's fixtures
+one_hot_cols = pred_df.select_dtypes(include=['object', 'category']).columns.tolist()
 pred_df = pd.get_dummies(pred_df)
 
 # Remove all rows from master data that are not in todays_df, use game_id to identify
@@ -69,12 +67,8 @@ extra_in_model = [f for f in pred_df.columns if f not in throw_features]
 
 print("Features expected by model and missing in data:", missing_from_model)
 print("Extra features in data not expected by model:", extra_in_model)
-# make extra_in_model columns in pred_df and set to 0
-for col in extra_in_model:
-    pred_df[col] = 0
-
-
-throw_df = pred_df[throw_features]
+# one-hot columns for teams etc. not playing today are set to 0; any other missing feature raises
+throw_df = model_features(pred_df, throw_features, one_hot_cols)
 # print cols with nan values
 print("Columns with nan values:", throw_df.columns[throw_df.isna().any()].tolist())
 total_throws_predictions = throw_model.predict(throw_df)
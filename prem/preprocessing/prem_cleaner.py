@@ -1,22 +1,17 @@
 import pandas as pd
-import re
-import pickle
+from src.utils.opponent_stats import add_opponent_columns
+from src.utils.id_registry import register_ids, map_ids
+from src.utils.schema import enforce_schema
 
 
 def cleaner(raw_data):
     # Drop ranking if its there
     if 'ranking' in raw_data.columns:
         raw_data = raw_data.drop(columns=['ranking', 'opp_ranking'])
-        # drop any , from attendance
-    if 'attendance' in raw_data.columns:
-        raw_data['attendance'] = raw_data['attendance'].str.replace(',', '')
-    raw_data[['competition', 'season', 'round']] = raw_data['competition'].apply(lambda x: pd.Series(process_competition(x)))
+    raw_data[['competition', 'season', 'round']] = process_competition(raw_data['competition'])
 
-    # make all cols numeric
-    cols_to_numeric = raw_data.columns.difference(
-        ['url', 'team', 'opp', 'venue_href', 'stadium', 'referee', 'competition', 'datetime', 'tourney_id', 'season',
-         'round'])
-    raw_data[cols_to_numeric] = raw_data[cols_to_numeric].apply(pd.to_numeric, errors='coerce')
+    # make all stat cols numeric (attendance loses its thousands separators)
+    raw_data = enforce_schema(raw_data)
     raw_data.columns = raw_data.columns.str.strip()
     raw_data = raw_data.drop_duplicates()
     raw_data['datetime'] = pd.to_datetime(raw_data['datetime'])
@@ -29,7 +24,7 @@ def cleaner(raw_data):
     raw_data['division'] = 'E1'
 
     # Latitude and Longitude
-    raw_data[['latitude', 'longitude']] = raw_data['venue_href'].apply(lambda x: pd.Series(extract_lat_lng(x)))
+    raw_data[['latitude', 'longitude']] = extract_lat_lng(raw_data['venue_href'])
 
     # rename own_half to passes_own_half
     raw_data.rename(columns={'own_half': 'passes_own_half'}, inplace=True)
@@ -46,86 +41,50 @@ def cleaner(raw_data):
     raw_data.rename(columns={'conc_non-penalty_xg': 'conc_np_xg'}, inplace=True)
 
 
-    # Create a dictionary to store the statistics for each team in each game
-    stats_dict = {}
+    # Opponent's stats come from the other row of the same game
+    raw_data = add_opponent_columns(raw_data, ['total_tackles', 'passes_own_half', 'passes_opp_half'])
 
-    # Populate the dictionary
-    for index, row in raw_data.iterrows():
-        game_id = row['game_id']
-        team = row['team']
-        total_tackles = row['total_tackles']
-        passes_own_half = row['passes_own_half']
-        passes_opp_half = row['passes_opp_half']
-
-        if game_id not in stats_dict:
-            stats_dict[game_id] = {}
-
-        stats_dict[game_id][team] = {
-            'total_tackles': total_tackles,
-            'passes_own_half': passes_own_half,
-            'passes_opp_half': passes_opp_half
-        }
-
-    # Function to find the opponent's statistics
-    def get_opponent_stats(row):
-        game_id = row['game_id']
-        team = row['team']
-        opponent_stats = {'conc_total_tackles': None, 'conc_passes_own_half': None, 'conc_passes_opp_half': None}
-
-        for opp_team, stats in stats_dict[game_id].items():
-            if opp_team != team:
-                opponent_stats['conc_total_tackles'] = stats['total_tackles']
-                opponent_stats['conc_passes_own_half'] = stats['passes_own_half']
-                opponent_stats['conc_passes_opp_half'] = stats['passes_opp_half']
-
-        return pd.Series(opponent_stats)
-
-    # Apply the function to get the opponent's statistics
-    raw_data[['conc_total_tackles', 'conc_passes_own_half', 'conc_passes_opp_half']] = raw_data.apply(get_opponent_stats, axis=1)
-
-    teams = pd.unique(raw_data[['team', 'opp']].values.ravel('K'))
-    team_id_mapping = {team: idx for idx, team in enumerate(teams, start=1)}
-    # Save the dictionary to a file
-    with open('data/PREM/fixed/prem_team_id_mapping.pkl', 'wb') as f:
-        pickle.dump(team_id_mapping, f)
-    raw_data['team_id'] = raw_data['team'].map(team_id_mapping)
-    raw_data['opp_id'] = raw_data['opp'].map(team_id_mapping)
+    # Teams keep their ids across runs; only new teams are appended to the registry
+    register_ids(raw_data[['team', 'opp']].values.ravel('K'), 'data/prem/fixed/prem_team_id_mapping.pkl')
+    raw_data['team_id'] = map_ids(raw_data['team'], 'data/prem/fixed/prem_team_id_mapping.pkl')
+    raw_data['opp_id'] = map_ids(raw_data['opp'], 'data/prem/fixed/prem_team_id_mapping.pkl')
     # Create a mapping of referee to referee_id
     # print("Referees:")
     # print(raw_data['referee'].unique())
-    raw_data['referee'] = raw_data['referee'].replace({
+    raw_data['referee'] = raw_data['referee'].astype(object).replace({
         'Andy Madley': 'Andrew Madley'})
-    referees = pd.unique(raw_data['referee'])
-    referee_id_mapping = {referee: idx for idx, referee in enumerate(referees, start=1)}
-
-    # Map the referee_id back to the DataFrame
-    raw_data['referee_id'] = raw_data['referee'].map(referee_id_mapping)
-
-    # Save the dictionary to a file
-    with open('data/prem/fixed/prem_referee_id_mapping.pkl', 'wb') as f:
-        pickle.dump(referee_id_mapping, f)
+    register_ids(raw_data['referee'], 'data/prem/fixed/prem_referee_id_mapping.pkl')
+    raw_data['referee_id'] = map_ids(raw_data['referee'], 'data/prem/fixed/prem_referee_id_mapping.pkl')
+    register_ids(raw_data['stadium'], 'data/prem/fixed/prem_stadium_id_mapping.pkl')
+    raw_data['stadium_id'] = map_ids(raw_data['stadium'], 'data/prem/fixed/prem_stadium_id_mapping.pkl')
 
     return raw_data
 
 
-def process_competition(comp):
-    # Step 1: Extract the season
-    season_match = re.search(r'(\d{4}/\d{4})$', comp)
-    season = season_match.group(0) if season_match else None
+def process_competition(competitions):
+    """
+    Split competition strings like 'Premier League Round 12 2023/2024' into competition, season and round.
+
+    Args:
+        competitions: Series of raw competition strings.
 
-    if season:
-        # Remove the season from the string
-        comp = comp[:season_match.start()].strip()
+    Returns:
+        DataFrame aligned with competitions with competition, season and round (strings, NaN where absent).
+    """
+    # Each distinct string is split once
+    distinct = pd.Series(competitions.dropna().unique(), dtype=object)
 
-    # Step 2: Extract the round number
-    round_match = re.search(r'Round\s(\d{1,2})$', comp)
-    round_num = round_match.group(1) if round_match else None
+    # Step 1: Extract the season and remove it from the string
+    season = distinct.str.extract(r'(\d{4}/\d{4})$', expand=False)
+    comp = distinct.where(season.isna(), distinct.str[:-9].str.strip())
 
-    if round_num:
-        # Remove 'Round X' from the string
-        comp = comp[:round_match.start()].strip()
+    # Step 2: Extract the round number and remove 'Round X' from the string
+    round_match = comp.str.extract(r'^(.*)Round\s(\d{1,2})$')
+    comp = comp.where(round_match[1].isna(), round_match[0].str.strip())
 
-    return comp, season, round_num
+    parts = pd.DataFrame({'competition': comp.to_numpy(), 'season': season.to_numpy(),
+                          'round': round_match[1].to_numpy()}, index=distinct.to_numpy())
+    return parts.reindex(competitions.to_numpy()).set_axis(competitions.index)
 
 
 stats_cols = [
@@ -318,29 +277,36 @@ def create_season_column(df, date_col='datetime'):
     # Convert the date column to datetime format if it's not already
     df[date_col] = pd.to_datetime(df[date_col], format='%d/%m/%y')
 
-    # Define the function to determine the season
-    def determine_season(date):
-        year = date.year
-        if date.month >= 8:  # August to December
-            season_start = year
-            season_end = year + 1
-        else:  # January to July
-            season_start = year - 1
-            season_end = year
-        return f"{str(season_start)[-2:]}-{str(season_end)[-2:]}"
-
-    # Apply the function to the DateTime column
-    df['season'] = df[date_col].apply(determine_season)
+    # Seasons run August to July, so January to July belongs to the season that started the year before
+    dates = df[date_col]
+    season_start = dates.dt.year - (dates.dt.month < 8)
+    df['season'] = ((season_start % 100).astype('Int64').astype(str).str.zfill(2) + '-' +
+                    ((season_start + 1) % 100).astype('Int64').astype(str).str.zfill(2)).where(dates.notna())
 
     return df
 
 
+# Coordinates of every venue link seen so far: venue_href -> (latitude, longitude)
+VENUE_CACHE = {}
+
+
+def extract_lat_lng(venue_hrefs):
+    """
+    Extract latitude and longitude from venue map links (e.g. '...?q=51.5549,-0.1084').
+
+    Each distinct link is parsed once per process; repeats come from VENUE_CACHE.
+
+    Args:
+        venue_hrefs: Series of venue links.
+
+    Returns:
+        DataFrame aligned with venue_hrefs with latitude and longitude (strings, NaN where absent).
+    """
+    uniques = pd.Series(venue_hrefs.dropna().unique(), dtype=object)
+    new = uniques[~uniques.isin(list(VENUE_CACHE))]
+    coordinates = new.str.extract(r"q=([-+]?\d*\.\d+),([-+]?\d*\.\d+)")
+    VENUE_CACHE.update(zip(new, coordinates.itertuples(index=False, name=None)))
 
-# Function to extract latitude and longitude from a URL
-def extract_lat_lng(url):
-    lat_lng_pattern = r"q=([-+]?\d*\.\d+),([-+]?\d*\.\d+)"
-    match = re.search(lat_lng_pattern, url)
-    if match:
-        return match.group(1), match.group(2)
-    else:
-        return None, None
+    venues = pd.DataFrame([VENUE_CACHE[href] for href in uniques], index=uniques.to_numpy(),
+                          columns=['latitude', 'longitude'])
+    return venues.reindex(venue_hrefs.to_numpy()).set_axis(venue_hrefs.index)
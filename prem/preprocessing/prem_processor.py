@@ -7,7 +7,6 @@ def prem_processer(raw_data):
     # Clean Data
     raw_data = raw_data.drop(columns=['touches_in_opposition_box', 'conc_touches_in_opposition_box'])
     cleaned_data = cleaner(raw_data)
-    cleaned_data[stats_cols] = cleaned_data[stats_cols].apply(pd.to_numeric, errors='coerce')
     # Feature Engineering
     processed_data = feature_engineering(cleaned_data, stats_cols)
     cleaned_data['year'] = cleaned_data['datetime'].dt.year
@@ -1,28 +1,14 @@
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options as ChromeOptions
-from webdriver_manager.chrome import ChromeDriverManager
 from selenium.webdriver.common.by import By
 from selenium.common.exceptions import NoSuchElementException, TimeoutException, ElementClickInterceptedException
 import time
+from src.scraper.browser import new_driver
 
 
 def scrape_game_urls():
-    # Set Chrome options
-    options = ChromeOptions()
-    options.add_argument("--no-sandbox")
-    options.add_argument("--disable-dev-shm-usage")
-
-    # Use ChromeDriverManager to automatically download and set up the driver
-    service = Service(ChromeDriverManager().install())
-
-    # Initialize the Chrome driver with options
-    driver = webdriver.Chrome(service=service, options=options)
+    # Initialize the Chrome driver (the shared profile already disables /dev/shm usage)
+    driver = new_driver(extra_arguments=['--no-sandbox'])
 
     try:
-        # Maximize the window
-        driver.maximize_window()
-
         # Navigate to the base URL
         base_url = "https://www.whoscored.com/Regions/252/Tournaments/2/Seasons/8618/England-Premier-League"
         driver.get(base_url)
@@ -1,6 +1,7 @@
 import os
 import pandas as pd
-from src.scraper.match_data import parallel_scrape
+from src.scraper.http_scraper import http_scrape
+from src.utils.storage import read_dataset, write_dataset, typed_frame
 
 
 def prem_game_scraper(scrape_type, new_urls_file=None, save_as=None, all_urls_list=None, new_urls=None):
@@ -19,7 +20,7 @@ def prem_game_scraper(scrape_type, new_urls_file=None, save_as=None, all_urls_li
 
     elif scrape_type == 'new':
         all_urls = new_urls
-        master_data = pd.read_csv('./data/prem/raw/prem_raw_master.csv')
+        master_data = read_dataset('prem_raw_master', columns=['game_id'])
         game_id = master_data['game_id'].max() + 1
 
     elif scrape_type == 'custom':
@@ -33,7 +34,8 @@ def prem_game_scraper(scrape_type, new_urls_file=None, save_as=None, all_urls_li
     elif scrape_type == 'list':
         all_urls = all_urls_list
 
-    results = parallel_scrape(all_urls)
+    # Plain HTTP first; only pages that need JavaScript get a browser
+    results = http_scrape(all_urls)
 
     for result in results:
         result['game_id'] = game_id
@@ -42,12 +44,12 @@ def prem_game_scraper(scrape_type, new_urls_file=None, save_as=None, all_urls_li
 
     final_df = pd.concat(dfs, ignore_index=True)
     if scrape_type == 'new':
-        previous_df = pd.read_csv('./data/prem/raw/prem_raw_master.csv')
-        final_df = pd.concat([previous_df, final_df], axis=0)
+        previous_df = read_dataset('prem_raw_master')
+        final_df = pd.concat([previous_df, typed_frame(final_df, 'prem_raw_master')], axis=0)
         final_df = final_df.drop_duplicates()
 
     if not save_as:
-        final_df.to_csv('./data/prem/raw/prem_raw_master.csv', index=False)
+        write_dataset(final_df, 'prem_raw_master')
     else:
         final_df.to_csv(f'./data/prem/raw/{save_as}.csv', index=False)
     return final_df
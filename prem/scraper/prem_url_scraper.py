@@ -1,21 +1,17 @@
 import os
 
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from webdriver_manager.chrome import ChromeDriverManager
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException
 from src.scraper.common_functions import handle_cookies
+from src.scraper.browser import new_driver
 
 
 def prem_url_scraper(season_1, season_2):
     urls = []  # List to store all extracted URLs
     # Set up WebDriver
-    service = Service(ChromeDriverManager().install())
-    driver = webdriver.Chrome(service=service)
-    driver.maximize_window()
+    driver = new_driver()
 
     # Wait initialization
     wait = WebDriverWait(driver, 5)
@@ -1,6 +1,7 @@
 import pandas as pd
-import re
-import pickle
+from src.utils.competition import parse_competitions
+from src.utils.opponent_stats import add_opponent_columns
+from src.utils.id_registry import register_ids, map_ids
 
 
 def cleaner(raw_data):
@@ -18,61 +19,8 @@ def cleaner(raw_data):
     raw_data['ranking'] = raw_data['ranking'].astype(int)
     raw_data['total_tackles'] = raw_data['tackles_won'] / (raw_data['tackles_won_pc'] / 100)
     raw_data['datetime'] = pd.to_datetime(raw_data['datetime'])
-    raw_data['tournament'] = 0
-    raw_data['division'] = 0
-    raw_data['knockout'] = 0
     # clean competition column
-    for index, row in raw_data.iterrows():
-        competition = row['competition'].lower()
-        if 'round' in competition:
-            if 'round of 16' in competition:
-                raw_data.at[index, 'round'] = 16
-                raw_data.at[index, 'knockout'] = 1
-            else:
-                match = re.search(r'round (\d+)', competition)
-                if match:
-                    raw_data.at[index, 'round'] = int(match.group(1))
-                    raw_data.at[index, 'knockout'] = 1
-
-        # Check for semi-final, quarter-final, and final
-        if 'semi-final' in competition:
-            raw_data.at[index, 'round'] = 'SF'
-            raw_data.at[index, 'knockout'] = 1
-        elif 'quarter-final' in competition:
-            raw_data.at[index, 'round'] = 'QF'
-            raw_data.at[index, 'knockout'] = 1
-        elif 'final' in competition and 'semi' not in competition and 'quarter' not in competition:
-            raw_data.at[index, 'round'] = 'F'
-            raw_data.at[index, 'knockout'] = 1
-        if 'friendly' in competition:
-            raw_data.at[index, 'competition'] = 'friendly'
-            raw_data.at[index, 'division'] = 1
-            raw_data.at[index, 'round'] = 0
-        elif 'qualification' in competition:
-            raw_data.at[index, 'competition'] = 'qualifier'
-            raw_data.at[index, 'division'] = 2
-        elif 'qualifier' in competition:
-            raw_data.at[index, 'competition'] = 'qualifier'
-            raw_data.at[index, 'division'] = 2
-        elif 'nations league' in competition:
-            raw_data.at[index, 'competition'] = 'nations league'
-            raw_data.at[index, 'division'] = 3
-        elif 'euros' in competition:
-            raw_data.at[index, 'competition'] = 'euros'
-            raw_data.at[index, 'tournament'] = 1
-            raw_data.at[index, 'division'] = 4
-        elif 'euro' in competition:
-            raw_data.at[index, 'competition'] = 'euros'
-            raw_data.at[index, 'tournament'] = 1
-            raw_data.at[index, 'division'] = 4
-        elif 'copa america' in competition:
-            raw_data.at[index, 'competition'] = 'copa america'
-            raw_data.at[index, 'tournament'] = 1
-            raw_data.at[index, 'division'] = 5
-        elif 'world cup' in competition:
-            raw_data.at[index, 'competition'] = 'world cup'
-            raw_data.at[index, 'tournament'] = 1
-            raw_data.at[index, 'division'] = 6
+    raw_data = parse_competitions(raw_data)
 
     # rename own_half to passes_own_half
     raw_data.rename(columns={'own_half': 'passes_own_half'}, inplace=True)
@@ -80,52 +28,15 @@ def cleaner(raw_data):
     raw_data.rename(columns={'conc_own_half': 'conc_passes_own_half'}, inplace=True)
     raw_data.rename(columns={'conc_opposition_half': 'conc_passes_opp_half'}, inplace=True)
 
-    # Create a dictionary to store the statistics for each team in each game
-    stats_dict = {}
-
-    # Populate the dictionary
-    for index, row in raw_data.iterrows():
-        game_id = row['game_id']
-        team = row['team']
-        total_tackles = row['total_tackles']
-        passes_own_half = row['passes_own_half']
-        passes_opp_half = row['passes_opp_half']
-
-        if game_id not in stats_dict:
-            stats_dict[game_id] = {}
-
-        stats_dict[game_id][team] = {
-            'total_tackles': total_tackles,
-            'passes_own_half': passes_own_half,
-            'passes_opp_half': passes_opp_half
-        }
-
-    # Function to find the opponent's statistics
-    def get_opponent_stats(row):
-        game_id = row['game_id']
-        team = row['team']
-        opponent_stats = {'conc_total_tackles': None, 'conc_passes_own_half': None, 'conc_passes_opp_half': None}
+    # Opponent's stats come from the other row of the same game
+    raw_data = add_opponent_columns(raw_data, ['total_tackles', 'passes_own_half', 'passes_opp_half'])
 
-        for opp_team, stats in stats_dict[game_id].items():
-            if opp_team != team:
-                opponent_stats['conc_total_tackles'] = stats['total_tackles']
-                opponent_stats['conc_passes_own_half'] = stats['passes_own_half']
-                opponent_stats['conc_passes_opp_half'] = stats['passes_opp_half']
-
-        return pd.Series(opponent_stats)
-
-    # Apply the function to get the opponent's statistics
-    raw_data[['conc_total_tackles', 'conc_passes_own_half', 'conc_passes_opp_half']] = raw_data.apply(get_opponent_stats, axis=1)
-
-    teams = pd.unique(raw_data[['team', 'opp']].values.ravel('K'))
-    team_id_mapping = {team: idx for idx, team in enumerate(teams, start=1)}
-    # Save the dictionary to a file
-    with open('data/fixed/team_id_mapping.pkl', 'wb') as f:
-        pickle.dump(team_id_mapping, f)
-    raw_data['team_id'] = raw_data['team'].map(team_id_mapping)
-    raw_data['opp_id'] = raw_data['opp'].map(team_id_mapping)
+    # Teams keep their ids across runs; only new teams are appended to the registry
+    register_ids(raw_data[['team', 'opp']].values.ravel('K'), 'data/fixed/team_id_mapping.pkl')
+    raw_data['team_id'] = map_ids(raw_data['team'], 'data/fixed/team_id_mapping.pkl')
+    raw_data['opp_id'] = map_ids(raw_data['opp'], 'data/fixed/team_id_mapping.pkl')
     # Create a mapping of referee to referee_id
-    raw_data['referee'] = raw_data['referee'].replace({
+    raw_data['referee'] = raw_data['referee'].astype(object).replace({
         'Fernando Rapallini': 'Fernando Andrés Rapallini',
         'Wilton Sampaio': 'Wilton Pereira Sampaio',
         'César Arturo Ramos Palazuelos': 'Cesar Ramos',
@@ -138,15 +49,10 @@ def cleaner(raw_data):
         'Halil Umut Meler': 'Halil Meler',
         'Espen Eskås': 'Espen Eskaas'
     })
-    referees = pd.unique(raw_data['referee'])
-    referee_id_mapping = {referee: idx for idx, referee in enumerate(referees, start=1)}
-
-    # Map the referee_id back to the DataFrame
-    raw_data['referee_id'] = raw_data['referee'].map(referee_id_mapping)
-
-    # Save the dictionary to a file
-    with open('data/fixed/referee_id_mapping.pkl', 'wb') as f:
-        pickle.dump(referee_id_mapping, f)
+    register_ids(raw_data['referee'], 'data/fixed/referee_id_mapping.pkl')
+    raw_data['referee_id'] = map_ids(raw_data['referee'], 'data/fixed/referee_id_mapping.pkl')
+    register_ids(raw_data['stadium'], 'data/fixed/stadium_id_mapping.pkl')
+    raw_data['stadium_id'] = map_ids(raw_data['stadium'], 'data/fixed/stadium_id_mapping.pkl')
 
     return raw_data
 
@@ -238,6 +144,7 @@ cols_not_for_modelling = [
     'latitude',
     'longitude',
     'stadium',
+    'stadium_id',
     'attendance',
     'referee',
     'possession',
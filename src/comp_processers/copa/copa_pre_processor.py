@@ -1,17 +1,21 @@
 import pandas as pd
 from src.comp_processers.copa.copa_cleaner import cleaner, stats_cols
 from src.feature_engineering.simple_fe import feature_engineering
+from src.feature_engineering.pipeline import INTERNATIONAL_THROWS
+from src.feature_engineering.feature_state import build_feature_state, save_feature_state
+from src.utils.storage import read_dataset
 
 # Load Data
-raw_data = pd.read_csv('data/raw/int_raw_master.csv')
+raw_data = read_dataset('int_raw_master')
 
 # Clean Data
 cleaned_data = cleaner(raw_data)
-cleaned_data[stats_cols] = cleaned_data[stats_cols].apply(pd.to_numeric, errors='coerce')
 
 # Feature Engineering
 processed_data = feature_engineering(cleaned_data, stats_cols)
 processed_data.to_csv('data/int_processed_master.csv', index=False)
+# snapshot the running aggregates so match-day predictions don't recompute the history
+save_feature_state(build_feature_state(processed_data, stats_cols, INTERNATIONAL_THROWS), 'data/feature_state_int.pkl')
 # print number of nans in every column
 processed_data = processed_data.dropna(subset=stats_cols)
 for col in processed_data.columns:
@@ -2,15 +2,15 @@ import pandas as pd
 from src.comp_processers.copa.copa_cleaner import cleaner, stats_cols
 from src.feature_engineering.simple_fe import feature_engineering
 from src.models.model_cleaner import filter_teams, european_countries
+from src.utils.storage import read_dataset
 
 # Load Data
-raw_data = pd.read_csv('data/raw/int_raw_master.csv')
+raw_data = read_dataset('int_raw_master')
 
 # Clean Data
 cleaned_data = cleaner(raw_data)
 cleaned_data = filter_teams(cleaned_data, european_countries)
 cleaned_data = filter_teams(cleaned_data, european_countries)
-cleaned_data[stats_cols] = cleaned_data[stats_cols].apply(pd.to_numeric, errors='coerce')
 
 # Feature Engineering
 processed_data = feature_engineering(cleaned_data, stats_cols)
@@ -0,0 +1,107 @@
+import numpy as np
+from src.feature_engineering.kernels import time_codes, same_game_earlier_pairs, safe_mean
+
+
+def fenwick_add(sums, counts, position, value):
+    """Add one observation to a Fenwick tree stored as two lists (1-based internally)."""
+    position += 1
+    while position < len(sums):
+        sums[position] += value
+        counts[position] += 1
+        position += position & -position
+
+
+def fenwick_prefix(sums, counts, position):
+    """Sum and count of the observations in the first ``position`` coordinates."""
+    total = 0.0
+    count = 0
+    while position > 0:
+        total += sums[position]
+        count += counts[position]
+        position -= position & -position
+    return total, count
+
+
+def earlier_band_means(df, value_column, target_column, bands=(6,)):
+    """
+    Mean of target_column over all strictly earlier games whose value_column is within ±band of each row's.
+
+    Rows are swept in datetime order with a Fenwick tree over the (compressed) values of value_column, so
+    each row costs O(log n) per band instead of a scan of every earlier game. Rows sharing a datetime are
+    all queried before any of them is inserted, and earlier rows of the same game_id are excluded.
+
+    Args:
+        df: The DataFrame containing match data.
+        value_column: Column used to decide similarity (e.g. 'opp_ranking').
+        target_column: Column to average (e.g. 'throws').
+        bands: Iterable of band half-widths.
+
+    Returns:
+        Dict mapping each band to a float array aligned with the rows of df.
+    """
+    times, valid_time = time_codes(df['datetime'])
+    values = df[value_column].to_numpy(dtype=float)
+    targets = df[target_column].to_numpy(dtype=float)
+    has_value = valid_time & ~np.isnan(values)
+    insertable = has_value & ~np.isnan(targets)
+
+    coords = np.unique(values[insertable])
+    positions = np.searchsorted(coords, values)
+    order = np.lexsort((np.arange(len(df)), times))
+    tie_breaks = np.flatnonzero(np.diff(times[order]) != 0) + 1
+    tie_groups = [group.tolist() for group in np.split(order, tie_breaks)] if len(order) else []
+    current, past = same_game_earlier_pairs(df)
+
+    # Plain lists keep the per-row Python loop fast
+    has_value_list, insertable_list = has_value.tolist(), insertable.tolist()
+    position_list, target_list = positions.tolist(), targets.tolist()
+
+    results = {}
+    for band in bands:
+        lower = np.searchsorted(coords, values - band, side='left').tolist()
+        upper = np.searchsorted(coords, values + band, side='right').tolist()
+        tree_sums = [0.0] * (len(coords) + 1)
+        tree_counts = [0] * (len(coords) + 1)
+        sums = [0.0] * len(df)
+        counts = [0] * len(df)
+
+        for group in tie_groups:
+            # Query the whole tie group before inserting it so no row sees a same-datetime game
+            for i in group:
+                if has_value_list[i]:
+                    upper_sum, upper_count = fenwick_prefix(tree_sums, tree_counts, upper[i])
+                    lower_sum, lower_count = fenwick_prefix(tree_sums, tree_counts, lower[i])
+                    sums[i] = upper_sum - lower_sum
+                    counts[i] = upper_count - lower_count
+            for i in group:
+                if insertable_list[i]:
+                    fenwick_add(tree_sums, tree_counts, position_list[i], target_list[i])
+
+        sums = np.array(sums)
+        counts = np.array(counts, dtype=float)
+
+        # Remove earlier rows of the same game (only non-zero when a game_id has several datetimes)
+        in_band = (has_value[current] & insertable[past] &
+                   (values[past] >= values[current] - band) & (values[past] <= values[current] + band))
+        np.subtract.at(sums, current[in_band], targets[past[in_band]])
+        np.subtract.at(counts, current[in_band], 1)
+
+        results[band] = safe_mean(sums, counts)
+    return results
+
+
+def add_band_averages(df, value_column, target_column, name, band):
+    """
+    Add earlier_band_means columns to df in place.
+
+    Args:
+        df: The DataFrame containing match data.
+        value_column: Column used to decide similarity.
+        target_column: Column to average.
+        name: Output column name.
+        band: Band half-width, or a list of widths to add one {name}_{band} column per width.
+    """
+    bands = [band] if np.isscalar(band) else list(band)
+    averages = earlier_band_means(df, value_column, target_column, bands)
+    for width, average in averages.items():
+        df[name if np.isscalar(band) else f'{name}_{width}'] = average
@@ -0,0 +1,75 @@
+import numpy as np
+import pandas as pd
+from src.feature_engineering.history_index import build_history_index, query_history_means
+
+# Opponent possession buckets (inclusive on both ends)
+POSSESSION_BUCKETS = [
+    (65, 100),
+    (58, 64),
+    (53, 57),
+    (48, 52),
+    (43, 47),
+    (36, 42),
+    (0, 35)
+]
+
+
+def assign_buckets(values, buckets):
+    """
+    Find the bucket each value falls in.
+
+    Args:
+        values: Array-like of values.
+        buckets: List of non-overlapping (start, end) pairs, inclusive on both ends.
+
+    Returns:
+        int array of bucket positions, -1 where the value is missing or falls between buckets.
+    """
+    intervals = pd.IntervalIndex.from_tuples(buckets, closed='both')
+    return intervals.get_indexer(np.asarray(values, dtype=float))
+
+
+def earlier_bucket_means(df, value_column, target_column, buckets=POSSESSION_BUCKETS):
+    """
+    Mean of target_column over strictly earlier games whose value_column falls in the same bucket as each row's.
+
+    Buckets are assigned for every row at once and the per-bucket running sums come from a
+    (bucket, datetime) history index, so each row is a binary search rather than a scan of every earlier game.
+    Earlier rows of the same game_id are excluded.
+
+    A row whose own value is missing or falls between buckets is compared against the last bucket, which is
+    where the original loop's bucket search fell through to.
+
+    Args:
+        df: The DataFrame containing match data.
+        value_column: Column to bucket (e.g. 'opp_avg_possession').
+        target_column: Column to average (e.g. 'throws').
+        buckets: List of (start, end) pairs, inclusive on both ends.
+
+    Returns:
+        float array aligned with the rows of df.
+    """
+    members = assign_buckets(df[value_column], buckets)
+    history = pd.DataFrame({
+        'bucket': np.where(members >= 0, members, np.nan),
+        'datetime': df['datetime'].to_numpy(),
+        'game_id': df['game_id'].to_numpy(),
+        target_column: df[target_column].to_numpy(dtype=float),
+    })
+    index = build_history_index(history, [target_column], key='bucket')
+    lookup = np.where(members >= 0, members, len(buckets) - 1).astype(float)
+    return query_history_means(index, lookup, history['datetime'], history['game_id'])[:, 0]
+
+
+def add_bucket_averages(df, value_column, target_column, name, buckets=POSSESSION_BUCKETS):
+    """
+    Add an earlier_bucket_means column to df in place.
+
+    Args:
+        df: The DataFrame containing match data.
+        value_column: Column to bucket.
+        target_column: Column to average.
+        name: Output column name.
+        buckets: List of (start, end) pairs, inclusive on both ends.
+    """
+    df[name] = earlier_bucket_means(df, value_column, target_column, buckets)
@@ -0,0 +1,278 @@
+import pickle
+import numpy as np
+import pandas as pd
+from src.feature_engineering.kernels import safe_mean, stat_matrix, group_codes
+from src.feature_engineering.history_index import (build_history_index, query_history_means,
+                                                   query_history_window_means)
+from src.feature_engineering.buckets import POSSESSION_BUCKETS, assign_buckets
+from src.feature_engineering.pipeline import add_columns
+
+# Incremental counterparts of the pipeline features: name -> {'build': state builder, 'apply': featurizer}
+INCREMENTAL = {}
+
+
+def register_incremental(name, build):
+    """
+    Register how a pipeline feature is computed from a saved feature state.
+
+    ``build(state, history, stats_cols, columns, **params)`` stores whatever running aggregates the feature
+    needs in ``state``; the decorated ``apply(state, df, stats_cols, columns, **params)`` adds the feature to
+    new rows using only those aggregates.
+
+    Args:
+        name: Name of the feature in the pipeline's steps.
+        build: Function that adds the feature's aggregates to the state.
+    """
+    def register(apply):
+        INCREMENTAL[name] = {'build': build, 'apply': apply}
+        return apply
+    return register
+
+
+def h2h_keys(df):
+    """Combine team_id and opp_id into one key per head-to-head pairing (NaN if either is missing)."""
+    keys = df['team_id'].astype(str) + '|' + df['opp_id'].astype(str)
+    return keys.where(df['team_id'].notna() & df['opp_id'].notna())
+
+
+def build_nothing(state, history, stats_cols, columns, **params):
+    pass
+
+
+def build_team_history(state, history, stats_cols, columns, **params):
+    if 'team_history' not in state:
+        state['team_history'] = build_history_index(history, stats_cols, key='team_id')
+
+
+def build_opponent_history(state, history, stats_cols, columns, **params):
+    state['opponent_history'] = build_history_index(history, stats_cols, key='team')
+
+
+def build_h2h_history(state, history, stats_cols, columns, **params):
+    state['h2h_history'] = build_history_index(history.assign(h2h_key=h2h_keys(history)), stats_cols,
+                                               key='h2h_key')
+
+
+def build_team_div_totals(state, history, stats_cols, columns, **params):
+    groups = group_codes(history, ['team_id', 'division'])
+    values, present = stat_matrix(history, stats_cols)
+    in_group = groups >= 0
+    sums = np.zeros((groups.max(initial=-1) + 1, len(stats_cols)))
+    counts = np.zeros_like(sums)
+    np.add.at(sums, groups[in_group], values[in_group])
+    np.add.at(counts, groups[in_group], present[in_group])
+    labels = history[['team_id', 'division']].assign(group=groups)[in_group].drop_duplicates('group')
+    state['team_div'] = {'labels': labels.reset_index(drop=True), 'sums': sums, 'counts': counts}
+
+
+def band_builder(value_role, target_column):
+    """State builder storing target sums over the history sorted by a similarity column."""
+    def build(state, history, stats_cols, columns, **params):
+        values = history[columns[value_role]].to_numpy(dtype=float)
+        targets = history[target_column].to_numpy(dtype=float)
+        keep = ~np.isnan(values) & ~np.isnan(targets)
+        order = np.argsort(values[keep], kind='stable')
+        prefix = np.zeros(keep.sum() + 1)
+        np.cumsum(targets[keep][order], out=prefix[1:])
+        state.setdefault('bands', {})[(columns[value_role], target_column)] = {
+            'values': values[keep][order],
+            'prefix': prefix,
+        }
+    return build
+
+
+def bucket_builder(target_column):
+    """State builder storing per-bucket target sums and counts over the history."""
+    def build(state, history, stats_cols, columns, buckets=POSSESSION_BUCKETS, **params):
+        members = assign_buckets(history[columns['opp_possession']], buckets)
+        targets = history[target_column].to_numpy(dtype=float)
+        keep = (members >= 0) & ~np.isnan(targets)
+        state.setdefault('buckets', {})[(columns['opp_possession'], target_column, tuple(buckets))] = {
+            'sums': np.bincount(members[keep], weights=targets[keep], minlength=len(buckets)),
+            'counts': np.bincount(members[keep], minlength=len(buckets)).astype(float),
+        }
+    return build
+
+
+def apply_band(state, df, columns, value_role, target_column, name, band):
+    """Average target_column over every history row within ±band of each new row's value."""
+    entry = state['bands'][(columns[value_role], target_column)]
+    values = df[columns[value_role]].to_numpy(dtype=float)
+    for width in ([band] if np.isscalar(band) else list(band)):
+        lower = np.searchsorted(entry['values'], values - width, side='left')
+        upper = np.searchsorted(entry['values'], values + width, side='right')
+        average = safe_mean(entry['prefix'][upper] - entry['prefix'][lower], (upper - lower).astype(float))
+        df[name if np.isscalar(band) else f'{name}_{width}'] = np.where(np.isnan(values), np.nan, average)
+
+
+def apply_bucket(state, df, columns, target_column, name, buckets):
+    """Average target_column over the history rows in each new row's possession bucket."""
+    entry = state['buckets'][(columns['opp_possession'], target_column, tuple(buckets))]
+    members = assign_buckets(df[columns['opp_possession']], buckets)
+    # Values between buckets fall through to the last bucket, as in earlier_bucket_means
+    members = np.where(members >= 0, members, len(buckets) - 1)
+    df[name] = safe_mean(entry['sums'][members], entry['counts'][members])
+
+
+@register_incremental('averages', build_team_history)
+def incremental_averages(state, df, stats_cols, columns):
+    averages = query_history_means(state['team_history'], df['team_id'], df['datetime'])
+    df = add_columns(df, [f'avg_{col}' for col in stats_cols], averages)
+    return df
+
+
+@register_incremental('rolling_averages', build_team_history)
+def incremental_rolling_averages(state, df, stats_cols, columns, window=5):
+    for size in ([window] if np.isscalar(window) else list(window)):
+        averages = query_history_window_means(state['team_history'], df['team_id'], df['datetime'], size)
+        prefix = 'rolling_avg_' if np.isscalar(window) else f'rolling_avg_{size}_'
+        df = add_columns(df, [f'{prefix}{col}' for col in stats_cols], averages)
+    return df
+
+
+@register_incremental('opponent_stats', build_opponent_history)
+def incremental_opponent_stats(state, df, stats_cols, columns):
+    averages = query_history_means(state['opponent_history'], df['opp'], df['datetime'])
+    df = add_columns(df, [f'opp_avg_{col}' for col in stats_cols], averages)
+    return df
+
+
+@register_incremental('quality_diff', build_nothing)
+def incremental_quality_diff(state, df, stats_cols, columns):
+    df[columns['quality_diff']] = df[columns['quality']] - df[columns['opp_quality']]
+    return df
+
+
+@register_incremental('throw_ins_adj_opp_quality', band_builder('opp_quality', 'throws'))
+def incremental_throw_ins_adj_opp_quality(state, df, stats_cols, columns, band=6):
+    apply_band(state, df, columns, 'opp_quality', 'throws', 'avg_TI_adj_opp_quality', band)
+    return df
+
+
+@register_incremental('throw_ins_adj_quality_diff', band_builder('quality_diff', 'throws'))
+def incremental_throw_ins_adj_quality_diff(state, df, stats_cols, columns, band=6):
+    apply_band(state, df, columns, 'quality_diff', 'throws', f"avg_TI_adj_{columns['quality_diff']}", band)
+    return df
+
+
+@register_incremental('tackles_adj_opp_quality', band_builder('opp_quality', 'total_tackles'))
+def incremental_tackles_adj_opp_quality(state, df, stats_cols, columns, band=6):
+    apply_band(state, df, columns, 'opp_quality', 'total_tackles', 'avg_tackles_adj_opp_quality', band)
+    return df
+
+
+@register_incremental('throw_ins_adj_opp_poss', bucket_builder('throws'))
+def incremental_throw_ins_adj_opp_poss(state, df, stats_cols, columns, buckets=POSSESSION_BUCKETS):
+    apply_bucket(state, df, columns, 'throws', 'avg_throw_ins_adj_opp_poss', buckets)
+    return df
+
+
+@register_incremental('tackles_adj_opp_poss', bucket_builder('total_tackles'))
+def incremental_tackles_adj_opp_poss(state, df, stats_cols, columns, buckets=POSSESSION_BUCKETS):
+    apply_bucket(state, df, columns, 'total_tackles', 'avg_tackles_adj_opp_poss', buckets)
+    return df
+
+
+@register_incremental('team_div_averages', build_team_div_totals)
+def incremental_team_div_averages(state, df, stats_cols, columns):
+    # New games are not in the history, so leaving them out means using the whole group
+    team_div = state['team_div']
+    groups = df[['team_id', 'division']].merge(team_div['labels'], on=['team_id', 'division'], how='left')
+    groups = groups['group'].fillna(-1).to_numpy(dtype=np.int64)
+    averages = np.full((len(df), len(stats_cols)), np.nan)
+    found = groups >= 0
+    averages[found] = safe_mean(team_div['sums'][groups[found]], team_div['counts'][groups[found]])
+    df = add_columns(df, [f'avg_team_div_{col}' for col in stats_cols], averages)
+    return df
+
+
+@register_incremental('h2h', build_h2h_history)
+def incremental_h2h(state, df, stats_cols, columns):
+    averages = query_history_means(state['h2h_history'], h2h_keys(df), df['datetime'])
+    df = add_columns(df, [f'avg_h2h_{col}' for col in stats_cols], averages)
+    return df
+
+
+def build_feature_state(history, stats_cols, pipeline):
+    """
+    Snapshot the running aggregates a pipeline needs to featurize new fixtures.
+
+    Args:
+        history: Processed master, i.e. the output of run_pipeline on the full history.
+        stats_cols: Stat columns the pipeline was run with.
+        pipeline: Pipeline config, e.g. INTERNATIONAL_THROWS.
+
+    Returns:
+        Dict of per-team running sums/counts, sorted histories and bucket aggregates.
+    """
+    state = {
+        'pipeline': pipeline,
+        'stats_cols': list(stats_cols),
+        'last_datetime': pd.to_datetime(history['datetime'], utc=True).max(),
+    }
+    for name, params in pipeline['steps']:
+        INCREMENTAL[name]['build'](state, history, stats_cols, pipeline['columns'], **params)
+    return state
+
+
+def save_feature_state(state, path):
+    with open(path, 'wb') as f:
+        pickle.dump(state, f)
+
+
+def load_feature_state(path):
+    with open(path, 'rb') as f:
+        return pickle.load(f)
+
+
+def append_and_featurize(state, new_rows):
+    """
+    Compute pipeline features for new fixtures from a saved feature state, without touching the history.
+
+    The result matches appending new_rows to the history and rerunning the pipeline, as long as the new
+    fixtures kick off after the last game in the snapshot.
+
+    Args:
+        state: Feature state from build_feature_state / load_feature_state.
+        new_rows: DataFrame of new fixtures with the same base columns as the history.
+
+    Returns:
+        new_rows sorted by datetime with every feature of the state's pipeline added.
+    """
+    df = new_rows.sort_values(by='datetime', kind='stable').reset_index(drop=True)
+    if (pd.to_datetime(df['datetime'], utc=True) <= state['last_datetime']).any():
+        raise ValueError("New fixtures must kick off after the last game in the feature state; "
+                         "rebuild the processed master with run_pipeline instead")
+
+    pipeline = state['pipeline']
+    for name, params in pipeline['steps']:
+        df = INCREMENTAL[name]['apply'](state, df, state['stats_cols'], pipeline['columns'], **params)
+    return df
+
+
+def model_features(pred_df, features, one_hot_columns):
+    """
+    Select a model's features from the one-hot encoded frame of today's fixtures.
+
+    Dummies of categories that do not occur today (e.g. teams not playing) are missing after get_dummies
+    and are filled with 0. Any other missing feature means a featurization step is missing or misnamed, so
+    it is an error rather than a column of zeros.
+
+    Args:
+        pred_df: Featurized fixtures after pd.get_dummies.
+        features: Feature names the model was trained on, in order.
+        one_hot_columns: Columns that were one-hot encoded; their dummies are named '{column}_{category}'.
+
+    Returns:
+        The model's feature columns of pred_df, in the model's order.
+
+    Raises:
+        ValueError: A feature other than a dummy of one_hot_columns is missing from pred_df.
+    """
+    prefixes = tuple(f'{col}_' for col in one_hot_columns)
+    missing = [f for f in features if f not in pred_df.columns]
+    not_one_hot = [f for f in missing if not f.startswith(prefixes)]
+    if not_one_hot:
+        raise ValueError(f"Features expected by the model are missing from the data: {not_one_hot}")
+    pred_df = add_columns(pred_df, missing, np.zeros((len(pred_df), len(missing)), dtype=np.int64))
+    return pred_df[features]
@@ -0,0 +1,145 @@
+import numpy as np
+import pandas as pd
+from src.feature_engineering.kernels import time_codes, stat_matrix, safe_mean
+
+
+def build_history_index(df, stat_columns, key='team'):
+    """
+    Build a sorted (key, datetime) index of cumulative stat sums and counts.
+
+    Rows are sorted once by key and datetime and encoded as a single int64 search key, so the sum of any
+    key's games before a given datetime is one binary search and one subtraction. Building is O(n log n).
+
+    Args:
+        df: The DataFrame containing match data.
+        stat_columns: List of columns to index.
+        key: Column identifying whose history each row belongs to (e.g. 'team').
+
+    Returns:
+        Dict of arrays describing the index (picklable, so it can be saved with the processed data).
+    """
+    times, valid = time_codes(df['datetime'])
+    valid &= df[key].notna().to_numpy()
+    labels, codes = np.unique(df.loc[valid, key].to_numpy(), return_inverse=True)
+    times = times[valid]
+    unique_times = np.unique(times)
+    time_ranks = np.searchsorted(unique_times, times)
+    stride = len(unique_times) + 1
+
+    search_keys = codes.astype(np.int64) * stride + time_ranks
+    order = np.argsort(search_keys, kind='stable')
+    values, present = stat_matrix(df.loc[valid], stat_columns)
+    values, present = values[order], present[order]
+
+    prefix = np.zeros((len(order) + 1, len(stat_columns)))
+    prefix_counts = np.zeros((len(order) + 1, len(stat_columns)))
+    np.cumsum(values, axis=0, out=prefix[1:])
+    np.cumsum(present, axis=0, out=prefix_counts[1:])
+
+    return {
+        'stat_columns': list(stat_columns),
+        'labels': labels,
+        'unique_times': unique_times,
+        'stride': stride,
+        'search_keys': search_keys[order],
+        'prefix': prefix,
+        'prefix_counts': prefix_counts,
+        'games': df.loc[valid, 'game_id'].to_numpy()[order],
+        'times': times[order],
+        'values': values,
+        'present': present,
+    }
+
+
+def history_positions(index, keys, datetimes):
+    """
+    Locate each key's indexed games strictly before the given datetimes.
+
+    Args:
+        index: Index built by build_history_index.
+        keys: Array-like of keys to look up.
+        datetimes: Array-like of datetimes.
+
+    Returns:
+        Tuple of (key codes, query time codes, valid mask, start, stop), where the key's earlier games are
+        the sorted index rows [start, stop).
+    """
+    keys = pd.Series(np.asarray(keys, dtype=object))
+    times, valid = time_codes(pd.Series(np.asarray(datetimes)))
+    codes = pd.Index(index['labels']).get_indexer(keys)
+    valid &= codes >= 0
+
+    stride = index['stride']
+    time_ranks = np.searchsorted(index['unique_times'], times, side='left')
+    start = np.searchsorted(index['search_keys'], codes.astype(np.int64) * stride, side='left')
+    stop = np.searchsorted(index['search_keys'], codes.astype(np.int64) * stride + time_ranks, side='left')
+    return codes, times, valid, np.where(valid, start, 0), np.where(valid, stop, 0)
+
+
+def query_history_sums(index, keys, datetimes, game_ids=None):
+    """
+    Sum and count each key's indexed stats strictly before the given datetimes.
+
+    Args:
+        index: Index built by build_history_index.
+        keys: Array-like of keys to look up (e.g. each row's opponent).
+        datetimes: Array-like of datetimes; only indexed games strictly earlier are counted.
+        game_ids: Optional array-like of game ids; earlier indexed rows with the same game_id are excluded.
+
+    Returns:
+        Tuple of (sums, counts), each of shape (len(keys), len(stat_columns)).
+    """
+    codes, times, valid, start, stop = history_positions(index, keys, datetimes)
+    sums = index['prefix'][stop] - index['prefix'][start]
+    counts = index['prefix_counts'][stop] - index['prefix_counts'][start]
+
+    if game_ids is not None:
+        # Drop earlier rows of the same game (only non-zero when a game_id has several datetimes)
+        stride = index['stride']
+        queries = pd.DataFrame({'code': codes, 'game_id': np.asarray(game_ids), 'time': times,
+                                'row': np.arange(len(codes))})[valid]
+        indexed = pd.DataFrame({'code': index['search_keys'] // stride, 'game_id': index['games'],
+                                'time_past': index['times'], 'pos': np.arange(len(index['games']))})
+        pairs = queries.merge(indexed, on=['code', 'game_id'])
+        pairs = pairs[pairs['time_past'] < pairs['time']]
+        np.subtract.at(sums, pairs['row'].to_numpy(), index['values'][pairs['pos'].to_numpy()])
+        np.subtract.at(counts, pairs['row'].to_numpy(), index['present'][pairs['pos'].to_numpy()])
+
+    return sums, counts
+
+
+def query_history_window_means(index, keys, datetimes, window):
+    """
+    Mean of each key's last ``window`` indexed games strictly before the given datetimes.
+
+    Args:
+        index: Index built by build_history_index.
+        keys: Array-like of keys to look up.
+        datetimes: Array-like of datetimes.
+        window: Number of most recent earlier games to average.
+
+    Returns:
+        float array of shape (len(keys), len(stat_columns)).
+    """
+    codes, times, valid, start, stop = history_positions(index, keys, datetimes)
+    window_start = np.maximum(start, stop - window)
+    sums = index['prefix'][stop] - index['prefix'][window_start]
+    counts = index['prefix_counts'][stop] - index['prefix_counts'][window_start]
+    return safe_mean(sums, counts)
+
+
+def query_history_means(index, keys, datetimes, game_ids=None):
+    """
+    Mean of each key's indexed stats strictly before the given datetimes.
+
+    Args:
+        index: Index built by build_history_index.
+        keys: Array-like of keys to look up.
+        datetimes: Array-like of datetimes.
+        game_ids: Optional array-like of game ids to exclude.
+
+    Returns:
+        float array of shape (len(keys), len(stat_columns)), NaN where the key has no earlier games.
+    """
+    sums, counts = query_history_sums(index, keys, datetimes, game_ids)
+    return safe_mean(sums, counts)
@@ -0,0 +1,248 @@
+import numpy as np
+import pandas as pd
+
+
+def time_codes(times):
+    """
+    Convert a datetime column to int64 codes that preserve ordering.
+
+    Args:
+        times: Series of datetimes (or datetime strings).
+
+    Returns:
+        Tuple of (int64 codes, boolean mask of rows with a valid datetime).
+    """
+    times = pd.to_datetime(times, utc=True)
+    valid = times.notna().to_numpy()
+    codes = times.dt.tz_localize(None).to_numpy(dtype='datetime64[ns]').astype(np.int64)
+    return codes, valid
+
+
+def group_codes(df, keys):
+    """
+    Encode one or more key columns as dense integer group codes.
+
+    Args:
+        df: The DataFrame containing match data.
+        keys: Column name or list of column names to group on.
+
+    Returns:
+        int64 array of group codes, -1 where any key is missing.
+    """
+    if isinstance(keys, str):
+        keys = [keys]
+    codes = df.groupby(keys, sort=False, dropna=True).ngroup()
+    return codes.fillna(-1).to_numpy(dtype=np.int64)
+
+
+def same_game_earlier_pairs(df):
+    """
+    Find pairs of rows that share a game_id where the second row kicked off strictly earlier.
+
+    The slow implementations drop rows with the current game_id from the "past" data. That only
+    matters when a game_id appears with different datetimes, so the vectorized kernels compute
+    everything by datetime and subtract these (rare) pairs afterwards.
+
+    Args:
+        df: The DataFrame containing match data.
+
+    Returns:
+        Tuple of (current row positions, earlier row positions).
+    """
+    times, valid = time_codes(df['datetime'])
+    rows = pd.DataFrame({
+        'game_id': df['game_id'].to_numpy(),
+        'time': times,
+        'pos': np.arange(len(df)),
+    })[valid & df['game_id'].notna().to_numpy()]
+    pairs = rows.merge(rows, on='game_id', suffixes=('', '_past'))
+    pairs = pairs[pairs['time_past'] < pairs['time']]
+    return pairs['pos'].to_numpy(), pairs['pos_past'].to_numpy()
+
+
+def stat_matrix(df, stat_columns):
+    """
+    Pull stat columns out as a float matrix along with their non-missing mask.
+
+    Args:
+        df: The DataFrame containing match data.
+        stat_columns: List of stat columns.
+
+    Returns:
+        Tuple of (values with NaN replaced by 0, boolean mask of non-missing values).
+    """
+    values = df[stat_columns].to_numpy(dtype=float)
+    present = ~np.isnan(values)
+    return np.where(present, values, 0.0), present
+
+
+def sorted_team_layout(keys, times, valid):
+    """
+    Sort rows by (key, datetime) and locate the start of each key group and each datetime tie.
+
+    Args:
+        keys: int64 group codes (-1 for missing).
+        times: int64 datetime codes.
+        valid: boolean mask of rows that may contribute to or receive an average.
+
+    Returns:
+        Tuple of (sort order, key group start per sorted row, datetime tie start per sorted row).
+    """
+    n = len(keys)
+    order = np.lexsort((np.arange(n), times, np.where(valid, keys, -1)))
+    sorted_keys = np.where(valid, keys, -1)[order]
+    sorted_times = times[order]
+    positions = np.arange(n)
+    new_key = np.ones(n, dtype=bool)
+    new_key[1:] = sorted_keys[1:] != sorted_keys[:-1]
+    new_tie = new_key.copy()
+    new_tie[1:] |= sorted_times[1:] != sorted_times[:-1]
+    key_start = np.maximum.accumulate(np.where(new_key, positions, 0))
+    tie_start = np.maximum.accumulate(np.where(new_tie, positions, 0))
+    return order, key_start, tie_start
+
+
+def prefix_sums(values, present):
+    """Exclusive prefix sums and counts with a leading zero row, so rows [a, b) sum to P[b] - P[a]."""
+    sums = np.zeros((len(values) + 1, values.shape[1]))
+    counts = np.zeros((len(values) + 1, values.shape[1]))
+    np.cumsum(values, axis=0, out=sums[1:])
+    np.cumsum(present, axis=0, out=counts[1:])
+    return sums, counts
+
+
+def safe_mean(sums, counts):
+    """Divide sums by counts, leaving NaN where nothing was counted."""
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(counts > 0, sums / np.where(counts > 0, counts, 1), np.nan)
+
+
+def expanding_means(df, stat_columns, key='team_id'):
+    """
+    Mean of every stat over each row's strictly earlier games for the same key, in one sorted pass.
+
+    Equivalent to filtering ``df[(df['datetime'] < row['datetime']) & (df[key] == row[key])]``, dropping
+    rows with the same game_id and taking the mean, for every row and every stat.
+
+    Args:
+        df: The DataFrame containing match data.
+        stat_columns: List of columns to average.
+        key: Column (or list of columns) identifying the team.
+
+    Returns:
+        float array of shape (len(df), len(stat_columns)) aligned with the rows of df.
+    """
+    times, valid = time_codes(df['datetime'])
+    keys = group_codes(df, key)
+    valid &= keys >= 0
+    values, present = stat_matrix(df, stat_columns)
+    values[~valid] = 0.0
+    present[~valid] = False
+
+    order, key_start, tie_start = sorted_team_layout(keys, times, valid)
+    prefix, prefix_counts = prefix_sums(values[order], present[order])
+
+    sums = np.empty_like(values)
+    counts = np.empty_like(values)
+    sums[order] = prefix[tie_start] - prefix[key_start]
+    counts[order] = prefix_counts[tie_start] - prefix_counts[key_start]
+
+    # Remove earlier rows of the same game (only non-zero when a game_id has several datetimes)
+    current, past = same_game_earlier_pairs(df)
+    same_key = (keys[current] == keys[past]) & valid[current] & valid[past]
+    np.subtract.at(sums, current[same_key], values[past[same_key]])
+    np.subtract.at(counts, current[same_key], present[past[same_key]])
+
+    means = safe_mean(sums, counts)
+    means[~valid] = np.nan
+    return means
+
+
+def rolling_means(df, stat_columns, windows=(5,), key='team_id'):
+    """
+    Mean of every stat over each row's last ``window`` strictly earlier games for the same key.
+
+    Equivalent to taking ``.tail(window)`` of the rows for the same key with an earlier datetime, dropping
+    rows with the same game_id and taking the mean. All windows share one sort and one set of prefix sums,
+    so extra window sizes cost a couple of array subtractions each.
+
+    Args:
+        df: The DataFrame containing match data.
+        stat_columns: List of columns to average.
+        windows: Iterable of window sizes.
+        key: Column (or list of columns) identifying the team.
+
+    Returns:
+        Dict mapping each window size to a float array of shape (len(df), len(stat_columns)).
+    """
+    times, valid = time_codes(df['datetime'])
+    keys = group_codes(df, key)
+    valid &= keys >= 0
+    values, present = stat_matrix(df, stat_columns)
+    values[~valid] = 0.0
+    present[~valid] = False
+
+    order, key_start, tie_start = sorted_team_layout(keys, times, valid)
+    prefix, prefix_counts = prefix_sums(values[order], present[order])
+    sorted_position = np.empty(len(order), dtype=np.int64)
+    sorted_position[order] = np.arange(len(order))
+
+    current, past = same_game_earlier_pairs(df)
+    same_key = (keys[current] == keys[past]) & valid[current] & valid[past]
+    current, past = current[same_key], past[same_key]
+
+    results = {}
+    for window in windows:
+        window_start = np.maximum(key_start, tie_start - window)
+        sums = np.empty_like(values)
+        counts = np.empty_like(values)
+        sums[order] = prefix[tie_start] - prefix[window_start]
+        counts[order] = prefix_counts[tie_start] - prefix_counts[window_start]
+
+        # Same-game rows only drop out if they made it into the window
+        in_window = sorted_position[past] >= window_start[sorted_position[current]]
+        np.subtract.at(sums, current[in_window], values[past[in_window]])
+        np.subtract.at(counts, current[in_window], present[past[in_window]])
+
+        means = safe_mean(sums, counts)
+        means[~valid] = np.nan
+        results[window] = means
+    return results
+
+
+def leave_one_game_out_means(df, stat_columns, keys=('team_id', 'division')):
+    """
+    Mean of every stat over all of a group's other games, as ``(group_sum - game_sum) / (group_count - game_count)``.
+
+    Equivalent to averaging each (team, division) group with the current game_id dropped, but done with one
+    grouped sum per key instead of a filter per row and stat.
+
+    Args:
+        df: The DataFrame containing match data.
+        stat_columns: List of columns to average.
+        keys: Columns identifying the group.
+
+    Returns:
+        float array of shape (len(df), len(stat_columns)) aligned with the rows of df.
+    """
+    keys = list(keys)
+    groups = group_codes(df, keys)
+    games = group_codes(df, keys + ['game_id'])
+    valid = (groups >= 0) & (games >= 0)
+    values, present = stat_matrix(df, stat_columns)
+
+    group_sums = np.zeros((groups.max(initial=-1) + 1, len(stat_columns)))
+    group_counts = np.zeros_like(group_sums)
+    game_sums = np.zeros((games.max(initial=-1) + 1, len(stat_columns)))
+    game_counts = np.zeros_like(game_sums)
+    # Rows with a missing game_id still count towards their group's totals
+    in_group = groups >= 0
+    np.add.at(group_sums, groups[in_group], values[in_group])
+    np.add.at(group_counts, groups[in_group], present[in_group])
+    np.add.at(game_sums, games[valid], values[valid])
+    np.add.at(game_counts, games[valid], present[valid])
+
+    means = np.full(values.shape, np.nan)
+    means[valid] = safe_mean(group_sums[groups[valid]] - game_sums[games[valid]],
+                             group_counts[groups[valid]] - game_counts[games[valid]])
+    return means
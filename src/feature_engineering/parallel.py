@@ -0,0 +1,125 @@
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+import numpy as np
+import pandas as pd
+from src.feature_engineering.kernels import (time_codes, group_codes, expanding_means, rolling_means,
+                                             leave_one_game_out_means)
+
+
+def codes_or_missing(series):
+    """Factorize a column to int64 codes, -1 where missing."""
+    return pd.factorize(series)[0].astype(np.int64)
+
+
+def share_array(array, blocks):
+    """Copy an array into a new shared memory block and return its (name, shape, dtype) spec."""
+    block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+    np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)[...] = array
+    blocks.append(block)
+    return block.name, array.shape, array.dtype.str
+
+
+def attach_array(spec, blocks):
+    """View a shared memory block described by share_array as a NumPy array."""
+    name, shape, dtype = spec
+    block = shared_memory.SharedMemory(name=name)
+    blocks.append(block)
+    return np.ndarray(shape, dtype=np.dtype(dtype), buffer=block.buf)
+
+
+def balanced_shards(keys, workers):
+    """Split team codes into ``workers`` shards with roughly equal row counts (largest team first)."""
+    codes, sizes = np.unique(keys[keys >= 0], return_counts=True)
+    shards = [[] for _ in range(workers)]
+    loads = np.zeros(workers)
+    for code, size in sorted(zip(codes.tolist(), sizes.tolist()), key=lambda item: -item[1]):
+        lightest = int(np.argmin(loads))
+        shards[lightest].append(code)
+        loads[lightest] += size
+    return [shard for shard in shards if shard]
+
+
+def team_shard_worker(specs, stats_cols, shard, kernel, params):
+    """
+    Run a per-team kernel on one shard of teams, reading inputs from and writing outputs to shared memory.
+
+    Rebuilds a small DataFrame for the shard's rows from the shared arrays (team, division and game ids are
+    integer codes, which is all the kernels need) so the full DataFrame is never pickled to the worker.
+    """
+    blocks = []
+    try:
+        keys = attach_array(specs['keys'], blocks)
+        rows = np.flatnonzero(np.isin(keys, shard))
+        times = attach_array(specs['times'], blocks)[rows]
+        valid = attach_array(specs['valid'], blocks)[rows]
+        games = attach_array(specs['games'], blocks)[rows]
+        divisions = attach_array(specs['divisions'], blocks)[rows]
+        values = attach_array(specs['values'], blocks)[rows]
+        output = attach_array(specs['output'], blocks)
+
+        frame = pd.DataFrame(values, columns=stats_cols)
+        frame['datetime'] = pd.to_datetime(np.where(valid, times, np.iinfo(np.int64).min), utc=True)
+        frame['team_id'] = keys[rows]
+        frame['game_id'] = np.where(games >= 0, games, np.nan)
+        frame['division'] = np.where(divisions >= 0, divisions, np.nan)
+
+        if kernel == 'averages':
+            output[0, rows] = expanding_means(frame, stats_cols, key='team_id')
+        elif kernel == 'rolling_averages':
+            for idx, averages in enumerate(rolling_means(frame, stats_cols, key='team_id', **params).values()):
+                output[idx, rows] = averages
+        elif kernel == 'team_div_averages':
+            output[0, rows] = leave_one_game_out_means(frame, stats_cols, keys=['team_id', 'division'])
+    finally:
+        for block in blocks:
+            block.close()
+
+
+def parallel_team_means(df, stats_cols, kernel, workers, **params):
+    """
+    Compute a per-team kernel with teams sharded across a process pool.
+
+    The stat matrix and id columns are placed in shared memory once; each worker reads only its teams' rows
+    and writes its results straight into a shared output array.
+
+    Args:
+        df: The DataFrame containing match data.
+        stats_cols: List of stat columns.
+        kernel: 'averages', 'rolling_averages' (pass ``windows``) or 'team_div_averages'.
+        workers: Number of worker processes.
+        **params: Extra kernel parameters.
+
+    Returns:
+        float array of shape (outputs, len(df), len(stats_cols)), one output per rolling window (else one).
+    """
+    times, valid = time_codes(df['datetime'])
+    keys = group_codes(df, 'team_id')
+    outputs = len(params['windows']) if kernel == 'rolling_averages' else 1
+
+    output = shared_memory.SharedMemory(create=True, size=outputs * len(df) * len(stats_cols) * 8 or 1)
+    results = np.ndarray((outputs, len(df), len(stats_cols)), dtype=float, buffer=output.buf)
+    results[...] = np.nan
+
+    blocks = [output]
+    try:
+        specs = {
+            'keys': share_array(keys, blocks),
+            'times': share_array(times, blocks),
+            'valid': share_array(valid, blocks),
+            'games': share_array(codes_or_missing(df['game_id']), blocks),
+            'divisions': share_array(codes_or_missing(df['division']) if 'division' in df.columns
+                                     else np.full(len(df), -1, dtype=np.int64), blocks),
+            'values': share_array(df[stats_cols].to_numpy(dtype=float), blocks),
+            'output': (output.name, results.shape, results.dtype.str),
+        }
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(team_shard_worker, specs, list(stats_cols), shard, kernel, params)
+                       for shard in balanced_shards(keys, workers)]
+            for future in futures:
+                future.result()
+        return results.copy()
+    finally:
+        del results
+        for block in blocks:
+            block.close()
+            block.unlink()
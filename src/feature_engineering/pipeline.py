@@ -0,0 +1,235 @@
+import numpy as np
+import pandas as pd
+from src.feature_engineering.kernels import expanding_means, rolling_means, leave_one_game_out_means
+from src.feature_engineering.history_index import build_history_index, query_history_means
+from src.feature_engineering.band_queries import add_band_averages
+from src.feature_engineering.buckets import POSSESSION_BUCKETS, add_bucket_averages
+from src.feature_engineering.parallel import parallel_team_means
+
+# Registered feature transforms: name -> {'func': transform, 'inputs': declared input columns, 'per_team': bool}
+FEATURES = {}
+
+# Placeholder in a feature's declared inputs that stands for every stat column
+STATS = '{stats}'
+
+
+def register_feature(name, inputs, per_team=False):
+    """
+    Register a vectorized feature transform.
+
+    Transforms are called as ``func(df, stats_cols, columns, **params)`` and return the DataFrame with their
+    columns added. ``columns`` maps the pipeline's role names (e.g. 'opp_quality') to the competition's
+    actual column names, so one transform serves every competition.
+
+    Args:
+        name: Name used to refer to the feature in a pipeline's steps.
+        inputs: Input columns the transform reads. Entries may be role names in braces (e.g. '{opp_quality}')
+            or STATS for the stat columns.
+        per_team: Whether the feature only looks within each team_id, so run_pipeline can shard it across
+            worker processes (the transform then takes a ``workers`` argument).
+    """
+    def register(func):
+        FEATURES[name] = {'func': func, 'inputs': list(inputs), 'per_team': per_team}
+        return func
+    return register
+
+
+def resolve_inputs(inputs, stats_cols, columns):
+    """Expand a feature's declared inputs into concrete column names."""
+    resolved = []
+    for column in inputs:
+        if column == STATS:
+            resolved.extend(stats_cols)
+        else:
+            resolved.append(column.format(**columns))
+    return resolved
+
+
+def add_columns(df, names, values):
+    """
+    Add the columns of a (rows x columns) array to df as one block.
+
+    Inserting them one at a time fragments the frame, which slows every later column access.
+
+    Returns:
+        The DataFrame with the columns added; columns that already exist are overwritten in place.
+    """
+    if df.columns.isin(names).any():
+        df[names] = values
+        return df
+    return pd.concat([df, pd.DataFrame(values, columns=names, index=df.index)], axis=1)
+
+
+@register_feature('averages', inputs=['datetime', 'team_id', 'game_id', STATS], per_team=True)
+def team_averages(df, stats_cols, columns, workers=None):
+    # Strictly-prior per-team means for every stat
+    if workers and workers > 1:
+        averages = parallel_team_means(df, stats_cols, 'averages', workers)[0]
+    else:
+        averages = expanding_means(df, stats_cols, key='team_id')
+    df = add_columns(df, [f'avg_{col}' for col in stats_cols], averages)
+    return df
+
+
+@register_feature('rolling_averages', inputs=['datetime', 'team_id', 'game_id', STATS], per_team=True)
+def team_rolling_averages(df, stats_cols, columns, window=5, workers=None):
+    # A list of windows adds one rolling_avg_{window}_{column} set per size
+    windows = [window] if np.isscalar(window) else list(window)
+    if workers and workers > 1:
+        rolling = dict(zip(windows, parallel_team_means(df, stats_cols, 'rolling_averages', workers, windows=windows)))
+    else:
+        rolling = rolling_means(df, stats_cols, windows, key='team_id')
+    for size, averages in rolling.items():
+        prefix = 'rolling_avg_' if np.isscalar(window) else f'rolling_avg_{size}_'
+        df = add_columns(df, [f'{prefix}{col}' for col in stats_cols], averages)
+    return df
+
+
+@register_feature('opponent_stats', inputs=['datetime', 'team', 'opp', 'game_id', STATS])
+def opponent_stats(df, stats_cols, columns, history=None):
+    # Opponent's strictly-prior means, looked up in a (team, datetime) index
+    if history is None:
+        history = build_history_index(df, stats_cols, key='team')
+    averages = query_history_means(history, df['opp'], df['datetime'], df['game_id'])
+    positions = [history['stat_columns'].index(col) for col in stats_cols]
+    df = add_columns(df, [f'opp_avg_{col}' for col in stats_cols], averages[:, positions])
+    return df
+
+
+@register_feature('quality_diff', inputs=['{quality}', '{opp_quality}'])
+def quality_diff(df, stats_cols, columns):
+    df[columns['quality_diff']] = df[columns['quality']] - df[columns['opp_quality']]
+    return df
+
+
+@register_feature('throw_ins_adj_opp_quality', inputs=['datetime', 'game_id', '{opp_quality}', 'throws'])
+def throw_ins_adj_opp_quality(df, stats_cols, columns, band=6):
+    add_band_averages(df, columns['opp_quality'], 'throws', 'avg_TI_adj_opp_quality', band)
+    return df
+
+
+@register_feature('throw_ins_adj_quality_diff', inputs=['datetime', 'game_id', '{quality_diff}', 'throws'])
+def throw_ins_adj_quality_diff(df, stats_cols, columns, band=6):
+    add_band_averages(df, columns['quality_diff'], 'throws', f"avg_TI_adj_{columns['quality_diff']}", band)
+    return df
+
+
+@register_feature('tackles_adj_opp_quality', inputs=['datetime', 'game_id', '{opp_quality}', 'total_tackles'])
+def tackles_adj_opp_quality(df, stats_cols, columns, band=6):
+    add_band_averages(df, columns['opp_quality'], 'total_tackles', 'avg_tackles_adj_opp_quality', band)
+    return df
+
+
+@register_feature('throw_ins_adj_opp_poss', inputs=['datetime', 'game_id', '{opp_possession}', 'throws'])
+def throw_ins_adj_opp_poss(df, stats_cols, columns, buckets=POSSESSION_BUCKETS):
+    add_bucket_averages(df, columns['opp_possession'], 'throws', 'avg_throw_ins_adj_opp_poss', buckets)
+    return df
+
+
+@register_feature('tackles_adj_opp_poss', inputs=['datetime', 'game_id', '{opp_possession}', 'total_tackles'])
+def tackles_adj_opp_poss(df, stats_cols, columns, buckets=POSSESSION_BUCKETS):
+    add_bucket_averages(df, columns['opp_possession'], 'total_tackles', 'avg_tackles_adj_opp_poss', buckets)
+    return df
+
+
+@register_feature('team_div_averages', inputs=['team_id', 'division', 'game_id', STATS], per_team=True)
+def team_div_averages(df, stats_cols, columns, workers=None):
+    # Leave-one-game-out mean of every other game the team played in this division
+    if workers and workers > 1:
+        averages = parallel_team_means(df, stats_cols, 'team_div_averages', workers)[0]
+    else:
+        averages = leave_one_game_out_means(df, stats_cols, keys=['team_id', 'division'])
+    df = add_columns(df, [f'avg_team_div_{col}' for col in stats_cols], averages)
+    return df
+
+
+@register_feature('h2h', inputs=['datetime', 'team_id', 'opp_id', 'game_id', STATS])
+def h2h_averages(df, stats_cols, columns):
+    # Strictly-prior means of the team's games against this opponent
+    averages = expanding_means(df, stats_cols, key=['team_id', 'opp_id'])
+    df = add_columns(df, [f'avg_h2h_{col}' for col in stats_cols], averages)
+    return df
+
+
+# Competition pipelines: role -> column names, and the ordered feature steps with their parameters
+INTERNATIONAL_COLUMNS = {
+    'quality': 'ranking',
+    'opp_quality': 'opp_ranking',
+    'quality_diff': 'rank_diff',
+    'opp_possession': 'opp_avg_possession',
+}
+
+INTERNATIONAL_THROWS = {
+    'columns': INTERNATIONAL_COLUMNS,
+    'steps': [
+        ('averages', {}),
+        ('opponent_stats', {}),
+        ('quality_diff', {}),
+        ('rolling_averages', {'window': 5}),
+        ('throw_ins_adj_opp_quality', {'band': 6}),
+        ('throw_ins_adj_quality_diff', {'band': 6}),
+        ('throw_ins_adj_opp_poss', {}),
+        ('team_div_averages', {}),
+    ],
+}
+
+INTERNATIONAL_TACKLES = {
+    'columns': INTERNATIONAL_COLUMNS,
+    'steps': [
+        ('opponent_stats', {}),
+        ('quality_diff', {}),
+        ('rolling_averages', {'window': 5}),
+        ('team_div_averages', {}),
+        ('tackles_adj_opp_poss', {}),
+        ('tackles_adj_opp_quality', {'band': 6}),
+    ],
+}
+
+PREMIER_LEAGUE = {
+    'columns': {
+        'quality': 'team_elo',
+        'opp_quality': 'opp_elo',
+        'quality_diff': 'elo_diff',
+        'opp_possession': 'avg_opp_possession',
+    },
+    'steps': [
+        ('averages', {}),
+        ('quality_diff', {}),
+        ('rolling_averages', {'window': 5}),
+        ('throw_ins_adj_opp_quality', {'band': 100}),
+        ('throw_ins_adj_quality_diff', {'band': 6}),
+        ('throw_ins_adj_opp_poss', {}),
+        ('opponent_stats', {}),
+        ('team_div_averages', {}),
+    ],
+}
+
+
+def run_pipeline(df, stats_cols, pipeline, workers=None, **step_params):
+    """
+    Run a competition's feature pipeline.
+
+    Args:
+        df: The DataFrame containing match data.
+        stats_cols: List of stat columns to build per-stat features for.
+        pipeline: Pipeline config, e.g. INTERNATIONAL_THROWS.
+        workers: Number of processes to shard per-team features across (default runs everything in-process).
+        **step_params: Extra parameters per step name, e.g. ``opponent_stats={'history': index}``.
+
+    Returns:
+        The DataFrame, sorted by datetime, with every step's features added.
+    """
+    df = df.sort_values(by='datetime', kind='stable').reset_index(drop=True)
+    columns = pipeline['columns']
+
+    for name, params in pipeline['steps']:
+        feature = FEATURES[name]
+        missing = [col for col in resolve_inputs(feature['inputs'], stats_cols, columns) if col not in df.columns]
+        if missing:
+            raise ValueError(f"Feature '{name}' is missing input columns: {missing}")
+        params = {**params, **step_params.get(name, {})}
+        if feature['per_team'] and workers:
+            params['workers'] = workers
+        df = feature['func'](df, stats_cols, columns, **params)
+
+    return df
@@ -0,0 +1,5 @@
+from src.feature_engineering.pipeline import run_pipeline, INTERNATIONAL_THROWS
+
+
+def feature_engineering(df, stats_cols):
+    return run_pipeline(df, stats_cols, INTERNATIONAL_THROWS)
@@ -7,11 +7,26 @@ import time
 import shap
 import matplotlib.pyplot as plt
 from src.model.model_cleaner import add_missing_team_id_columns, add_missing_opp_id_columns
+from src.feature_engineering.pipeline import INTERNATIONAL_TACKLES
+from src.feature_engineering.feature_state import build_feature_state, save_feature_state
+from src.utils.schema import enforce_schema
 import joblib
 from imblearn.over_sampling import SMOTE
 
 # Load data
 full_df = pd.read_csv("data/processed_master_tackles_4.csv")
+
+# Stats the tackle features were engineered from
+stats_cols = ['accurate_passes', 'accurate_passes_pc',
+              'fouls_committed', 'corners', 'blocked_shots', 'passes',
+              'passes_own_half', 'passes_opp_half', 'accurate_long_balls', 'accurate_long_balls_pc',
+              'accurate_crosses', 'accurate_crosses_pc', 'throws',
+              'yellow_cards', 'red_cards', 'tackles_won', 'tackles_won_pc', 'interceptions', 'blocks', 'clearances',
+              'duels_won', 'ground_duels_won', 'ground_duels_won_pc', 'aerial_duels_won',
+              'aerial_duels_won_pc', 'successful_dribbles', 'successful_dribbles_pc', 'possession', 'total_tackles']
+# snapshot the running aggregates so match-day predictions (engine/tackle_main.py) don't recompute the history
+history = enforce_schema(full_df.assign(datetime=pd.to_datetime(full_df['datetime'])))
+save_feature_state(build_feature_state(history, stats_cols, INTERNATIONAL_TACKLES), 'data/feature_state_tackles_4.pkl')
 # round total tackles
 full_df['total_tackles'] = full_df['total_tackles'].round()
 # print max team_id
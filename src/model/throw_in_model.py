@@ -10,9 +10,10 @@ import joblib
 from src.model.model_cleaner import filter_teams, european_countries
 from imblearn.over_sampling import SMOTE
 from src.utils.simple_cleaner import cols_not_for_modelling
+from src.utils.storage import read_dataset
 
 # Load data
-full_df = pd.read_csv("data/processed_master_throws_6.csv")
+full_df = read_dataset('processed_master_throws_6')
 
 # Drop columns not for modelling from full_df if they are in full_df
 full_df = full_df.drop(columns=cols_not_for_modelling, errors='ignore')
@@ -0,0 +1,101 @@
+import threading
+from selenium import webdriver
+from selenium.webdriver.chrome.service import Service
+from selenium.common.exceptions import WebDriverException
+from webdriver_manager.chrome import ChromeDriverManager
+
+# Chrome flags for scraping: no GPU, extensions, background services, sound or notifications
+CHROME_ARGUMENTS = [
+    '--disable-gpu',
+    '--disable-extensions',
+    '--disable-dev-shm-usage',
+    '--disable-background-networking',
+    '--disable-background-timer-throttling',
+    '--disable-renderer-backgrounding',
+    '--disable-sync',
+    '--disable-translate',
+    '--disable-notifications',
+    '--disable-default-apps',
+    '--no-first-run',
+    '--no-default-browser-check',
+    '--mute-audio',
+]
+
+# Content settings (2 = block): images, notifications, popups, geolocation and media devices
+CHROME_PREFS = {
+    'profile.managed_default_content_settings.images': 2,
+    'profile.default_content_setting_values.notifications': 2,
+    'profile.default_content_setting_values.popups': 2,
+    'profile.default_content_setting_values.geolocation': 2,
+    'profile.default_content_setting_values.media_stream': 2,
+}
+
+# Requests cut off inside the browser: images, media, fonts and third-party ad/tracker hosts. The
+# cookie-consent script is left alone, since the scrapers click through its banner.
+BLOCKED_URLS = [
+    '*.png', '*.jpg', '*.jpeg', '*.gif', '*.webp', '*.avif', '*.svg', '*.ico',
+    '*.mp4', '*.webm', '*.m3u8', '*.mp3',
+    '*.woff', '*.woff2', '*.ttf', '*.otf',
+    '*doubleclick.net*', '*googlesyndication.com*', '*googleadservices.com*', '*google-analytics.com*',
+    '*googletagmanager.com*', '*adnxs.com*', '*amazon-adsystem.com*', '*criteo.com*', '*taboola.com*',
+    '*outbrain.com*', '*scorecardresearch.com*', '*hotjar.com*', '*facebook.net*', '*connect.facebook.com*',
+    '*quantserve.com*', '*pubmatic.com*', '*rubiconproject.com*', '*casalemedia.com*',
+]
+
+# chromedriver binary path, installed once per process and shared by every driver
+DRIVER_PATHS = {}
+INSTALL_LOCK = threading.Lock()
+
+
+def chromedriver_path():
+    with INSTALL_LOCK:
+        if 'chrome' not in DRIVER_PATHS:
+            DRIVER_PATHS['chrome'] = ChromeDriverManager().install()
+    return DRIVER_PATHS['chrome']
+
+
+def new_driver(headless=True, block_resources=True, extra_arguments=()):
+    """
+    Start a Chrome driver with the scraping profile.
+
+    Args:
+        headless: Run without a window, at a fixed desktop size so pages keep the layout the XPaths expect.
+            A windowed driver is maximised instead.
+        block_resources: Block images, media, fonts and ad/tracker requests (BLOCKED_URLS).
+        extra_arguments: Further Chrome flags (e.g. '--no-sandbox').
+
+    Returns:
+        The webdriver.Chrome instance.
+    """
+    options = webdriver.ChromeOptions()
+    if headless:
+        options.add_argument('--headless=new')
+        options.add_argument('--window-size=1920,1080')
+    for argument in [*CHROME_ARGUMENTS, *extra_arguments]:
+        options.add_argument(argument)
+    if block_resources:
+        options.add_argument('--blink-settings=imagesEnabled=false')
+        options.add_experimental_option('prefs', CHROME_PREFS)
+
+    driver = webdriver.Chrome(service=Service(chromedriver_path()), options=options)
+    if block_resources:
+        driver.execute_cdp_cmd('Network.enable', {})
+        driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': BLOCKED_URLS})
+    if not headless:
+        driver.maximize_window()
+    return driver
+
+
+def driver_alive(driver):
+    try:
+        driver.current_url
+        return True
+    except WebDriverException:
+        return False
+
+
+def quit_driver(driver):
+    try:
+        driver.quit()
+    except WebDriverException:
+        pass
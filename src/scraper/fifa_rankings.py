@@ -1,12 +1,10 @@
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from webdriver_manager.chrome import ChromeDriverManager
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException, ElementClickInterceptedException
 import time
 import pandas as pd
+from src.scraper.browser import new_driver
 
 
 def handle_cookies(wait):
@@ -77,9 +75,7 @@ def get_toggle_options(wait, driver, toggle_button_xpath, options_xpath):
 
 
 # Set up WebDriver
-service = Service(ChromeDriverManager().install())
-driver = webdriver.Chrome(service=service)
-driver.maximize_window()
+driver = new_driver()
 
 # Wait initialization
 wait = WebDriverWait(driver, 10)
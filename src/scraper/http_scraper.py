@@ -0,0 +1,200 @@
+import concurrent.futures
+from urllib.parse import urlsplit
+import pandas as pd
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from src.scraper.next_data import html_match_details, match_frame
+from src.scraper.page_cache import cached_pages, read_page, store_match_page
+from src.utils.schema import clean_scraped, enforce_schema
+
+# Sent with every request so the site serves the same server-rendered page a desktop browser gets
+HEADERS = {
+    'User-Agent': ('Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) '
+                   'Chrome/126.0.0.0 Safari/537.36'),
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+    'Accept-Language': 'en-GB,en;q=0.9',
+}
+
+# Columns engine/future_scraper.py returns for a fixture
+FIXTURE_COLUMNS = ['team', 'ranking', 'opp', 'opp_ranking', 'datetime', 'stadium', 'referee', 'competition',
+                   'venue_href']
+
+# Sessions shared by the calls in this process: pool size -> requests.Session
+SESSIONS = {}
+
+
+def new_session(pool_size=16, retries=2):
+    """
+    requests.Session keeping up to pool_size connections per host open, retrying throttled and failed requests.
+    """
+    session = requests.Session()
+    retry = Retry(total=retries, backoff_factor=0.5, status_forcelist=[429, 500, 502, 503, 504])
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    session.headers.update(HEADERS)
+    return session
+
+
+def shared_session(pool_size=16):
+    if pool_size not in SESSIONS:
+        SESSIONS[pool_size] = new_session(pool_size)
+    return SESSIONS[pool_size]
+
+
+def page_url(url, base_url=None):
+    """
+    URL a match page's stats tab is fetched from.
+
+    Args:
+        url: Match URL.
+        base_url: Optional scheme and host (e.g. 'http://127.0.0.1:8000') to fetch from instead of the URL's
+            own, such as a local server of saved pages. The path is kept; the fragment is never sent.
+    """
+    if base_url is None:
+        return url + ':tab=stats'
+    parts = urlsplit(url)
+    return f"{base_url.rstrip('/')}{parts.path}:tab=stats"
+
+
+def fetch_html(session, url, timeout=10):
+    """A page's HTML, None if the request failed."""
+    try:
+        response = session.get(url, timeout=timeout)
+        response.raise_for_status()
+    except requests.RequestException as e:
+        print(f"Request failed for URL: {url} - {e}")
+        return None
+    return response.text
+
+
+def http_match_details(session, url, require_stats=True, timeout=10, use_cache=True, base_url=None):
+    """
+    Read a match's details from its server-rendered HTML, fetched without a browser.
+
+    With use_cache the page is read from the page cache when it holds a fresh copy (finished matches are
+    never refetched), and fetched pages are added to it. base_url fetches from another host (see page_url);
+    the rows keep the match URL.
+
+    Returns:
+        Tuple of (team1 details, team2 details, team1 stats, team2 stats) as in page_match_details; None to
+        skip the match; False if the page needs a browser.
+    """
+    html = read_page(url) if use_cache else None
+    if html is None:
+        html = fetch_html(session, page_url(url, base_url), timeout)
+        if html is None:
+            return False
+        if use_cache:
+            store_match_page(url, html)
+    return html_match_details(html, url, require_stats)
+
+
+def http_single_match(session, url, timeout=10, use_cache=True, base_url=None):
+    """std_single_match over plain HTTP: the match DataFrame, None to skip it, False if it needs a browser."""
+    print(f'Fetching URL: {url}')
+    try:
+        details = http_match_details(session, url, timeout=timeout, use_cache=use_cache, base_url=base_url)
+    except Exception as e:
+        print(f"Error while fetching URL: {url} - {e}")
+        return False
+    if not details:
+        return details
+    return match_frame(*details)
+
+
+def http_fixture(url, session=None, timeout=10, use_cache=True, base_url=None):
+    """
+    engine/future_scraper.py's scrape_single_match over plain HTTP.
+
+    Returns:
+        The fixture's two rows, or None if the page needs a browser.
+    """
+    details = http_match_details(session or shared_session(), url, require_stats=False, timeout=timeout,
+                                 use_cache=use_cache, base_url=base_url)
+    if not details:
+        return None
+    df = pd.DataFrame([{col: team_data[col] for col in FIXTURE_COLUMNS} for team_data in details[:2]])
+    df = clean_scraped(df)
+    df.columns = df.columns.str.lower().str.replace(' ', '_')
+    return enforce_schema(df)
+
+
+def http_pages(all_urls, max_workers=16, session=None, use_cache=True, base_url=None):
+    """
+    The plain-HTTP pass of http_scrape, without the browser fallback.
+
+    Returns:
+        Tuple of (list of the non-empty match DataFrames, URLs whose pages need a browser), both in the order
+        of all_urls. Skipped matches (extra time) are in neither.
+    """
+    session = session or shared_session(max_workers)
+    results, needs_browser = [], []
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+        frames = executor.map(lambda url: http_single_match(session, url, use_cache=use_cache, base_url=base_url),
+                              all_urls)
+        for url, df in zip(all_urls, frames):
+            if df is False:
+                needs_browser.append(url)
+            elif df is not None and not df.empty:
+                results.append(df)
+    return results, needs_browser
+
+
+def http_scrape(all_urls, max_workers=16, browser_fallback=True, browser_workers=4, session=None, use_cache=True,
+                base_url=None):
+    """
+    Scrape match URLs over pooled HTTP connections, using browsers only for pages that need JavaScript.
+
+    Args:
+        all_urls: Match URLs to scrape.
+        max_workers: Number of concurrent requests.
+        browser_fallback: Scrape pages whose HTML has no usable page data with parallel_scrape; otherwise
+            they are reported and skipped.
+        browser_workers: Number of drivers for the fallback.
+        session: Optional requests.Session; default one shared per process.
+        use_cache: Read pages from the page cache where it has them and cache the pages fetched.
+        base_url: Optional scheme and host to fetch the pages from instead of the URLs' own, e.g. a local
+            server of saved pages (see page_url). The browser fallback always uses the real URLs.
+
+    Returns:
+        List of the non-empty match DataFrames.
+    """
+    results, needs_browser = http_pages(all_urls, max_workers, session, use_cache, base_url)
+    if needs_browser:
+        print(f"{len(needs_browser)} of {len(all_urls)} pages need a browser")
+        if browser_fallback:
+            # Imported here so the HTTP path runs without selenium installed
+            from src.scraper.match_data import parallel_scrape
+            results.extend(parallel_scrape(needs_browser, max_workers=browser_workers))
+    return results
+
+
+def replay_cache(urls=None):
+    """
+    Rebuild match DataFrames from cached pages, without touching the network.
+
+    Used to re-parse every scraped match after the parsers or the schema change.
+
+    Args:
+        urls: Match URLs to replay, in order; default every cached match page.
+
+    Returns:
+        List of the non-empty match DataFrames. URLs not in the cache, or whose pages no longer parse,
+        are reported and left out.
+    """
+    if urls is None:
+        pages = list(cached_pages())
+    else:
+        pages = [(url, read_page(url, max_age=None)) for url in urls]
+    results, missing = [], []
+    for url, html in pages:
+        details = html_match_details(html, url) if html is not None else False
+        if details is False:
+            missing.append(url)
+        elif details is not None:
+            results.append(match_frame(*details))
+    if missing:
+        print(f"{len(missing)} of {len(pages)} pages could not be replayed from the cache")
+    return results
@@ -1,9 +1,10 @@
 import os
 import pandas as pd
-from src.scraper.match_data import parallel_scrape
+from src.scraper.http_scraper import http_scrape, replay_cache
+from src.utils.storage import read_dataset, write_dataset, typed_frame
 
 
-def international_game_scraper(scrape_type, new_urls_file=None, save_as=None, all_urls_list=None):
+def international_game_scraper(scrape_type, new_urls_file=None, save_as=None, all_urls_list=None, replay=False):
     all_urls = []
     dfs = []
     game_id = 1001
@@ -23,13 +24,18 @@ def international_game_scraper(scrape_type, new_urls_file=None, save_as=None, al
             urls = f.readlines()
             all_urls.extend([url.strip() for url in urls])
         all_urls = [url.strip() for url in all_urls]
-        master_data = pd.read_csv('data/raw_master.csv')
+        master_data = read_dataset('int_raw_master', columns=['game_id'])
         game_id = master_data['game_id'].max() + 1
 
     elif scrape_type == 'list':
         all_urls = all_urls_list
 
-    results = parallel_scrape(all_urls)
+    if replay:
+        # Re-parse the cached pages only, e.g. after the parsed columns changed
+        results = replay_cache(all_urls)
+    else:
+        # Plain HTTP first; only pages that need JavaScript get a browser
+        results = http_scrape(all_urls)
 
     for result in results:
         result['game_id'] = game_id
@@ -38,12 +44,12 @@ def international_game_scraper(scrape_type, new_urls_file=None, save_as=None, al
 
     final_df = pd.concat(dfs, ignore_index=True)
     if scrape_type == 'new':
-        previous_df = pd.read_csv('data/raw/raw_master.csv')
-        final_df = pd.concat([previous_df, final_df], axis=0)
+        previous_df = read_dataset('int_raw_master')
+        final_df = pd.concat([previous_df, typed_frame(final_df, 'int_raw_master')], axis=0)
         final_df = final_df.drop_duplicates()
 
     if not save_as:
-        final_df.to_csv('data/raw/int_raw_master.csv', index=False)
+        write_dataset(final_df, 'int_raw_master')
     else:
         final_df.to_csv(f'data/raw/{save_as}.csv', index=False)
     return final_df
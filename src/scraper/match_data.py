@@ -1,14 +1,16 @@
 import re
 from bs4 import BeautifulSoup
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from webdriver_manager.chrome import ChromeDriverManager
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.common.by import By
 from selenium.common.exceptions import TimeoutException
 import pandas as pd
 import concurrent.futures
+import queue
+from src.scraper.browser import new_driver, driver_alive, quit_driver
+from src.scraper.next_data import (RANKING_XPATHS, extract_next_data, html_match_details, match_frame,
+                                   page_match_details, set_rankings)
+from src.scraper.page_cache import read_page, store_match_page
 
 
 def extract_attribute_data(driver, class_name_keyword):
@@ -24,186 +26,244 @@ def extract_attribute_data(driver, class_name_keyword):
         print(f"Failed to extract data for {class_name_keyword}: {e}")
 
 
-def std_single_match(driver, url):
-    print(f'Scraping URL: {url}')
+def xpath_match_details(driver, url):
+    """
+    Read a loaded match page's details and stats element by element (fallback for pages without usable
+    page data).
+
+    Returns:
+        Tuple of (team1 details, team2 details, team1 stats, team2 stats); None to skip a match that went to
+        extra time or penalties, an empty DataFrame if the page is missing its teams or stats.
+    """
+    wait = WebDriverWait(driver, 5)
     try:
-        driver.get(url + ':tab=stats')
-        wait = WebDriverWait(driver, 5)
-        try:
-            consent_button = wait.until(EC.element_to_be_clickable((By.XPATH, "//button[contains(@class, 'fc-cta-consent')]")))
-            consent_button.click()
-        except Exception:
-            pass
-        # Check for extra time or penalties
-        try:
-            ET_pens_xpath = '/html/body/div[1]/main/main/div[2]/div/div[1]/div[1]/div/section/div/section/header/div[2]/span'
-            ET_pens = wait.until(EC.visibility_of_element_located((By.XPATH, ET_pens_xpath))).text
-            if 'extra' in ET_pens.lower() or 'pen' in ET_pens.lower():
-                print(f"Extra time match: {url}, skipping.")
-                return None  # Indicate to skip this URL
-        except Exception:
-            pass
+        consent_button = wait.until(EC.element_to_be_clickable((By.XPATH, "//button[contains(@class, 'fc-cta-consent')]")))
+        consent_button.click()
+    except Exception:
+        pass
+    # Check for extra time or penalties
+    try:
+        ET_pens_xpath = '/html/body/div[1]/main/main/div[2]/div/div[1]/div[1]/div/section/div/section/header/div[2]/span'
+        ET_pens = wait.until(EC.visibility_of_element_located((By.XPATH, ET_pens_xpath))).text
+        if 'extra' in ET_pens.lower() or 'pen' in ET_pens.lower():
+            print(f"Extra time match: {url}, skipping.")
+            return None  # Indicate to skip this URL
+    except Exception:
+        pass
 
-        try:
-            team1_xpath = "/html/body/div[1]/main/main/div[2]/div/div[1]/div[1]/div/section/div/section/header/div[1]/a/div/span/span[2]"
-            team2_xpath = "/html/body/div[1]/main/main/div[2]/div/div[1]/div[1]/div/section/div/section/header/div[3]/a/div/span/span[2]"
-            team1_name = wait.until(EC.visibility_of_element_located((By.XPATH, team1_xpath))).text
-            team2_name = wait.until(EC.visibility_of_element_located((By.XPATH, team2_xpath))).text
-        except TimeoutException:
-            print(f"Team names not found for URL: {url}")
-            return pd.DataFrame()
+    try:
+        team1_xpath = "/html/body/div[1]/main/main/div[2]/div/div[1]/div[1]/div/section/div/section/header/div[1]/a/div/span/span[2]"
+        team2_xpath = "/html/body/div[1]/main/main/div[2]/div/div[1]/div[1]/div/section/div/section/header/div[3]/a/div/span/span[2]"
+        team1_name = wait.until(EC.visibility_of_element_located((By.XPATH, team1_xpath))).text
+        team2_name = wait.until(EC.visibility_of_element_located((By.XPATH, team2_xpath))).text
+    except TimeoutException:
+        print(f"Team names not found for URL: {url}")
+        return pd.DataFrame()
 
-        team1_ranking, team2_ranking = None, None
-        try:
-            team1_ranking_xpath = "//*[@id='__next']/main/main/div[2]/div/div[1]/div[1]/div/section/div/section/header/div[1]/a/div/span/span[3]"
-            team2_ranking_xpath = "//*[@id='__next']/main/main/div[2]/div/div[1]/div[1]/div/section/div/section/header/div[3]/a/div/span/span[3]"
-            team1_ranking = wait.until(EC.visibility_of_element_located((By.XPATH, team1_ranking_xpath))).text.split('#')[-1].strip()
-            team2_ranking = wait.until(EC.visibility_of_element_located((By.XPATH, team2_ranking_xpath))).text.split('#')[-1].strip()
-        except TimeoutException:
-            print(f"FIFA rankings not found for URL: {url}")
+    team1_ranking, team2_ranking = None, None
+    try:
+        team1_ranking = wait.until(EC.visibility_of_element_located((By.XPATH, RANKING_XPATHS[0]))).text.split('#')[-1].strip()
+        team2_ranking = wait.until(EC.visibility_of_element_located((By.XPATH, RANKING_XPATHS[1]))).text.split('#')[-1].strip()
+    except TimeoutException:
+        print(f"FIFA rankings not found for URL: {url}")
 
-        match_datetime, venue, venue_href, competition, referee, attendance, possession_t1, possession_t2 = (
-            None, None, None, None, None, None, None, None)
+    match_datetime, venue, venue_href, competition, referee, attendance, possession_t1, possession_t2 = (
+        None, None, None, None, None, None, None, None)
 
+    try:
+        datetime_xpath = "//*[@id='__next']/main/main/div[2]/div/div[1]/div[1]/div/section/div/div[2]/section/ul/li[1]/div/time"
+        match_datetime = wait.until(EC.visibility_of_element_located((By.XPATH, datetime_xpath))).get_attribute('datetime')
+    except TimeoutException:
+        print(f"Datetime not found for URL: {url}")
+
+    try:
+        competition_xpath = "//*[@id='__next']/main/main/div[2]/div/div[1]/div[1]/div/section/div/div[1]/div/div[2]/a/span"
+        competition = wait.until(EC.visibility_of_element_located((By.XPATH, competition_xpath))).text
+    except TimeoutException:
+        print(f"Competition not found for URL: {url}")
+
+    # Extract attendance
+    attendance = extract_attribute_data(driver, "Attendance")
+
+    # Extract referee
+    referee = extract_attribute_data(driver, "Reveree")
+    if not referee:
+        referee = extract_attribute_data(driver, "Referee")
+
+    # Extract venue
+    venue_data = extract_attribute_data(driver, "Venue")
+    if venue_data:
+        venue, venue_href = venue_data
+
+    possession_xpaths_t1 = [
+        '//*[@id="__next"]/main/main/div[2]/div/div[1]/div[2]/section/section/div[1]/ul/div/div[1]/span',
+        '/html/body/div[1]/main/main/div[2]/div/div[1]/div[2]/section/section/div[1]/ul/div/div[1]/span',
+        '/html/body/div[1]/main/main/div[2]/div/div[1]/div[2]/section/section/div[2]/ul/div/div[1]/span',
+        '/html/body/div[1]/main/main/div[2]/div/div[1]/div[3]/section/section/div[2]/ul/div/div[1]/span',
+    ]
+    possession_xpaths_t2 = [
+        '//*[@id="__next"]/main/main/div[2]/div/div[1]/div[2]/section/section/div[1]/ul/div/div[2]/span',
+        '/html/body/div[1]/main/main/div[2]/div/div[1]/div[2]/section/section/div[1]/ul/div/div[2]/span',
+        '/html/body/div[1]/main/main/div[2]/div/div[1]/div[2]/section/section/div[2]/ul/div/div[2]/span',
+        '/html/body/div[1]/main/main/div[2]/div/div[1]/div[3]/section/section/div[2]/ul/div/div[2]/span',
+    ]
+
+    for xpath in possession_xpaths_t1:
         try:
-            datetime_xpath = "//*[@id='__next']/main/main/div[2]/div/div[1]/div[1]/div/section/div/div[2]/section/ul/li[1]/div/time"
-            match_datetime = wait.until(EC.visibility_of_element_located((By.XPATH, datetime_xpath))).get_attribute('datetime')
+            possession_t1 = wait.until(EC.visibility_of_element_located((By.XPATH, xpath))).text
+            break
         except TimeoutException:
-            print(f"Datetime not found for URL: {url}")
+            continue
 
+    for xpath in possession_xpaths_t2:
         try:
-            competition_xpath = "//*[@id='__next']/main/main/div[2]/div/div[1]/div[1]/div/section/div/div[1]/div/div[2]/a/span"
-            competition = wait.until(EC.visibility_of_element_located((By.XPATH, competition_xpath))).text
+            possession_t2 = wait.until(EC.visibility_of_element_located((By.XPATH, xpath))).text
+            break
         except TimeoutException:
-            print(f"Competition not found for URL: {url}")
-
-        # Extract attendance
-        attendance = extract_attribute_data(driver, "Attendance")
-
-        # Extract referee
-        referee = extract_attribute_data(driver, "Reveree")
-        if not referee:
-            referee = extract_attribute_data(driver, "Referee")
-
-        # Extract venue
-        venue_data = extract_attribute_data(driver, "Venue")
-        if venue_data:
-            venue, venue_href = venue_data
-
-        possession_xpaths_t1 = [
-            '//*[@id="__next"]/main/main/div[2]/div/div[1]/div[2]/section/section/div[1]/ul/div/div[1]/span',
-            '/html/body/div[1]/main/main/div[2]/div/div[1]/div[2]/section/section/div[1]/ul/div/div[1]/span',
-            '/html/body/div[1]/main/main/div[2]/div/div[1]/div[2]/section/section/div[2]/ul/div/div[1]/span',
-            '/html/body/div[1]/main/main/div[2]/div/div[1]/div[3]/section/section/div[2]/ul/div/div[1]/span',
-        ]
-        possession_xpaths_t2 = [
-            '//*[@id="__next"]/main/main/div[2]/div/div[1]/div[2]/section/section/div[1]/ul/div/div[2]/span',
-            '/html/body/div[1]/main/main/div[2]/div/div[1]/div[2]/section/section/div[1]/ul/div/div[2]/span',
-            '/html/body/div[1]/main/main/div[2]/div/div[1]/div[2]/section/section/div[2]/ul/div/div[2]/span',
-            '/html/body/div[1]/main/main/div[2]/div/div[1]/div[3]/section/section/div[2]/ul/div/div[2]/span',
-        ]
-
-        for xpath in possession_xpaths_t1:
-            try:
-                possession_t1 = wait.until(EC.visibility_of_element_located((By.XPATH, xpath))).text
-                break
-            except TimeoutException:
-                continue
+            continue
 
-        for xpath in possession_xpaths_t2:
-            try:
-                possession_t2 = wait.until(EC.visibility_of_element_located((By.XPATH, xpath))).text
-                break
-            except TimeoutException:
-                continue
+    try:
+        stats_containers = wait.until(EC.presence_of_all_elements_located(
+            (By.XPATH, "//ul[contains(@class, 'StatGroupContainer')]")))
+    except TimeoutException:
+        print(f"Stats containers not found for URL: {url}")
+        return pd.DataFrame()
 
-        try:
-            stats_containers = wait.until(EC.presence_of_all_elements_located(
-                (By.XPATH, "//ul[contains(@class, 'StatGroupContainer')]")))
-        except TimeoutException:
-            print(f"Stats containers not found for URL: {url}")
-            return pd.DataFrame()
-
-        team1_data = {
-            'url': url, 'team': team1_name, 'ranking': team1_ranking, 'opp': team2_name, 'opp_ranking': team2_ranking,
-            'datetime': match_datetime, 'stadium': venue, 'referee': referee, 'attendance': attendance,
-            'competition': competition, 'possession': possession_t1, 'opp_possession': possession_t2,
-            'venue_href': venue_href
-        }
-        team2_data = {
-            'url': url, 'team': team2_name, 'ranking': team2_ranking, 'opp': team1_name, 'opp_ranking': team1_ranking,
-            'datetime': match_datetime, 'stadium': venue, 'referee': referee, 'attendance': attendance,
-            'competition': competition, 'possession': possession_t2, 'opp_possession': possession_t1,
-            'venue_href': venue_href
-        }
-
-        team1_stats = {}
-        team2_stats = {}
-
-        for container in stats_containers:
-            soup = BeautifulSoup(container.get_attribute('outerHTML'), 'html.parser')
-            for li in soup.find_all("li", class_=re.compile(".*Stat.*")):
-                title_element = li.find("span", class_=re.compile(".*StatTitle.*"))
-                if title_element:
-                    stat_name = title_element.text.strip()
-                    values = [span.text.strip() for span in li.find_all("span", class_=re.compile(".*StatValue.*"))]
-                    if len(values) == 2:
-                        team1_stats[stat_name], team1_stats[stat_name + '_pc'] = values[0].split(' (') if '(' in values[
-                            0] else (values[0], '')
-                        team2_stats[stat_name], team2_stats[stat_name + '_pc'] = values[1].split(' (') if '(' in values[
-                            1] else (values[1], '')
-
-        df_team1 = pd.DataFrame([team1_stats])
-        df_team2 = pd.DataFrame([team2_stats])
-
-        df_team2_conceded = df_team2.rename(columns=lambda x: f'conc_{x}')
-        df_team1_combined = pd.concat([df_team1, df_team2_conceded], axis=1)
-
-        df_team1_conceded = df_team1.rename(columns=lambda x: f'conc_{x}')
-        df_team2_combined = pd.concat([df_team2, df_team1_conceded], axis=1)
-
-        df_team1_combined = pd.concat([pd.DataFrame([team1_data]), df_team1_combined], axis=1)
-        df_team2_combined = pd.concat([pd.DataFrame([team2_data]), df_team2_combined], axis=1)
-        df = pd.concat([df_team1_combined, df_team2_combined]).reset_index(drop=True)
-
-        df = df.replace({'\(': '', '\)': ''}, regex=True)
-        df = df.replace({'%': ''}, regex=True)
-        df = df.replace({'#': ''}, regex=True)
-        df = df.replace('', pd.NA)
-
-        cols_to_drop = [col for col in df.columns if '_pc' in col and df[col].isna().all()]
-        df = df.drop(columns=cols_to_drop)
-
-        df.columns = df.columns.str.lower().str.replace(' ', '_')
-        return df
+    team1_data = {
+        'url': url, 'team': team1_name, 'ranking': team1_ranking, 'opp': team2_name, 'opp_ranking': team2_ranking,
+        'datetime': match_datetime, 'stadium': venue, 'referee': referee, 'attendance': attendance,
+        'competition': competition, 'possession': possession_t1, 'opp_possession': possession_t2,
+        'venue_href': venue_href
+    }
+    team2_data = {
+        'url': url, 'team': team2_name, 'ranking': team2_ranking, 'opp': team1_name, 'opp_ranking': team1_ranking,
+        'datetime': match_datetime, 'stadium': venue, 'referee': referee, 'attendance': attendance,
+        'competition': competition, 'possession': possession_t2, 'opp_possession': possession_t1,
+        'venue_href': venue_href
+    }
+
+    team1_stats = {}
+    team2_stats = {}
+
+    for container in stats_containers:
+        soup = BeautifulSoup(container.get_attribute('outerHTML'), 'html.parser')
+        for li in soup.find_all("li", class_=re.compile(".*Stat.*")):
+            title_element = li.find("span", class_=re.compile(".*StatTitle.*"))
+            if title_element:
+                stat_name = title_element.text.strip()
+                values = [span.text.strip() for span in li.find_all("span", class_=re.compile(".*StatValue.*"))]
+                if len(values) == 2:
+                    team1_stats[stat_name], team1_stats[stat_name + '_pc'] = values[0].split(' (') if '(' in values[
+                        0] else (values[0], '')
+                    team2_stats[stat_name], team2_stats[stat_name + '_pc'] = values[1].split(' (') if '(' in values[
+                        1] else (values[1], '')
+
+    return team1_data, team2_data, team1_stats, team2_stats
+
+
+def header_rankings(driver):
+    """FIFA rankings shown in the page header, read without waiting (None where absent)."""
+    rankings = []
+    for xpath in RANKING_XPATHS:
+        elements = driver.find_elements(By.XPATH, xpath)
+        rankings.append(elements[0].text.split('#')[-1].strip() if elements else None)
+    return rankings
+
+
+def next_data_match_details(driver, url, html):
+    """Match details and stats from the loaded page's __NEXT_DATA__ (see page_match_details)."""
+    details = page_match_details(extract_next_data(html), url)
+    if details:
+        set_rankings(details[0], details[1], header_rankings(driver))
+    return details
+
+
+def std_single_match(driver, url, use_cache=True):
+    print(f'Scraping URL: {url}')
+    try:
+        # A fresh cached page (any page of a finished match) needs no browser at all
+        html = read_page(url) if use_cache else None
+        if html is not None:
+            details = html_match_details(html, url)
+            if details is not False:
+                return details if details is None else match_frame(*details)
+        driver.get(url + ':tab=stats')
+        html = driver.page_source
+        if use_cache:
+            store_match_page(url, html)
+        # One page load plus a walk over the embedded page data; XPaths only when that is unusable
+        details = next_data_match_details(driver, url, html)
+        if details is False:
+            details = xpath_match_details(driver, url)
+        if details is None or isinstance(details, pd.DataFrame):
+            return details
+        return match_frame(*details)
     except Exception as e:
         print(f"Error while scraping URL: {url} - {e}")
         return pd.DataFrame()
 
 
-def scrape_urls(urls):
-    options = webdriver.ChromeOptions()
-    service = Service(ChromeDriverManager().install())
-    driver = webdriver.Chrome(service=service, options=options)
-    driver.maximize_window()
+def scrape_worker(work, results, retries=1, headless=True):
+    """
+    Scrape URLs from a shared queue with one warm driver until the queue is empty.
 
-    results = []
-    for url in urls:
-        df = std_single_match(driver, url)
-        if df is None:
-            continue
-        if not df.empty:
-            results.append(df)
-
-    driver.quit()
-    return results
+    A driver that dies mid-page is replaced and the URL is put back on the queue (up to retries times), so
+    one crashed browser neither loses its URL nor stalls the other workers.
 
-
-def parallel_scrape(all_urls, max_workers=4):
-    chunks = [all_urls[i::max_workers] for i in range(max_workers)]
-    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
-        futures = [executor.submit(scrape_urls, chunk) for chunk in chunks]
-        results = []
+    Args:
+        work: queue.Queue of (url, attempt) pairs.
+        results: List the scraped DataFrames are appended to.
+        retries: How many times a URL is retried after its driver died.
+        headless: Whether to run the browser headless.
+    """
+    driver = None
+    try:
+        while True:
+            try:
+                url, attempt = work.get_nowait()
+            except queue.Empty:
+                return
+            if driver is None:
+                driver = new_driver(headless)
+            df = std_single_match(driver, url)
+            if df is not None and not df.empty:
+                results.append(df)
+            elif not driver_alive(driver):
+                quit_driver(driver)
+                driver = None
+                if attempt < retries:
+                    work.put((url, attempt + 1))
+    finally:
+        if driver is not None:
+            quit_driver(driver)
+
+
+def scrape_urls(urls, headless=True):
+    return parallel_scrape(urls, max_workers=1, headless=headless)
+
+
+def parallel_scrape(all_urls, max_workers=4, retries=1, headless=True):
+    """
+    Scrape match URLs with a bounded pool of drivers fed from one work queue.
+
+    Each worker takes the next URL as soon as it is free, so a slow page only holds up its own driver.
+
+    Args:
+        all_urls: Match URLs to scrape.
+        max_workers: Number of drivers (and threads).
+        retries: How many times a URL is retried after its driver died.
+        headless: Whether to run the browsers headless.
+
+    Returns:
+        List of the non-empty match DataFrames, in completion order.
+    """
+    work = queue.Queue()
+    for url in all_urls:
+        work.put((url, 0))
+    results = []
+    workers = max(1, min(max_workers, len(all_urls)))
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(scrape_worker, work, results, retries, headless) for _ in range(workers)]
         for future in concurrent.futures.as_completed(futures):
-            results.extend(future.result())
+            future.result()
     return results
@@ -0,0 +1,213 @@
+import json
+import re
+import lxml.html
+import pandas as pd
+from src.utils.schema import clean_scraped, enforce_schema
+
+# The page data Next.js embeds in every server-rendered fotmob page
+NEXT_DATA_PATTERN = re.compile(r'<script id="__NEXT_DATA__" type="application/json"[^>]*>(.*?)</script>', re.S)
+
+# Status reasons of matches decided after extra time or on penalties
+EXTRA_TIME_REASONS = ('aet', 'pen', 'extra')
+
+# Stat keys read into their own columns rather than the stat columns
+POSSESSION_KEY = 'BallPossesion'
+
+# FIFA ranking spans of the two teams in the match header
+RANKING_XPATHS = [
+    "//*[@id='__next']/main/main/div[2]/div/div[1]/div[1]/div/section/div/section/header/div[1]/a/div/span/span[3]",
+    "//*[@id='__next']/main/main/div[2]/div/div[1]/div[1]/div/section/div/section/header/div[3]/a/div/span/span[3]",
+]
+
+
+def extract_next_data(html):
+    """Parsed __NEXT_DATA__ JSON of a page's HTML, None if the page has none."""
+    match = NEXT_DATA_PATTERN.search(html or '')
+    if not match:
+        return None
+    try:
+        return json.loads(match.group(1))
+    except ValueError:
+        return None
+
+
+def match_finished(next_data):
+    """Whether the page data is of a finished match, whose page can no longer change."""
+    try:
+        return bool(next_data['props']['pageProps']['header']['status'].get('finished'))
+    except (KeyError, TypeError, AttributeError):
+        return False
+
+
+def split_stat(value):
+    """Split a stat like '321 (85%)' into its value and percentage ('321', '85%)'), as the page shows them."""
+    value = str(value).strip()
+    if '(' in value:
+        number, percentage = value.split(' (', 1)
+        return number, percentage
+    return value, ''
+
+
+def went_to_extra_time(next_data):
+    reason = next_data['props']['pageProps']['header']['status'].get('reason') or {}
+    text = f"{reason.get('short', '')} {reason.get('long', '')}".lower()
+    return any(word in text for word in EXTRA_TIME_REASONS)
+
+
+def info_box(page):
+    return (page.get('content', {}).get('matchFacts') or {}).get('infoBox') or {}
+
+
+def competition_name(page):
+    """'League Round N Season' from the tournament info, matching the competition text the page shows."""
+    tournament = info_box(page).get('Tournament') or {}
+    general = page.get('general', {})
+    parts = [tournament.get('leagueName') or general.get('leagueName'),
+             tournament.get('roundName') or general.get('leagueRoundName'),
+             tournament.get('selectedSeason')]
+    return ' '.join(str(part) for part in parts if part) or None
+
+
+def venue_details(page):
+    """(stadium name, map link with its coordinates) of the match venue."""
+    stadium = info_box(page).get('Stadium') or {}
+    venue_href = None
+    if stadium.get('lat') is not None and stadium.get('long') is not None:
+        venue_href = f"https://maps.google.com/maps?q={float(stadium['lat'])},{float(stadium['long'])}"
+    return stadium.get('name'), venue_href
+
+
+def stat_groups(page):
+    periods = ((page.get('content', {}).get('stats') or {}).get('Periods') or {})
+    return (periods.get('All') or {}).get('stats') or []
+
+
+def match_details(next_data, url):
+    """
+    Map a match page's __NEXT_DATA__ to the per-team match details and stats the page shows.
+
+    Args:
+        next_data: Parsed __NEXT_DATA__ of the match page.
+        url: Match URL, stored with the rows.
+
+    Returns:
+        Tuple of (team1 details, team2 details, team1 stats, team2 stats) keyed like the XPath scrape, with
+        ranking None (it is not in the payload).
+
+    Raises:
+        KeyError, IndexError, TypeError: The payload is not a match page with both teams.
+    """
+    page = next_data['props']['pageProps']
+    teams = page['header']['teams']
+    team1_name, team2_name = teams[0]['name'], teams[1]['name']
+    info = info_box(page)
+    match_date = info.get('Match Date') or {}
+    match_datetime = match_date.get('utcTime') or page['header']['status'].get('utcTime') or \
+        page.get('general', {}).get('matchTimeUTCDate')
+    referee = (info.get('Referee') or {}).get('text')
+    attendance = info.get('Attendance')
+    venue, venue_href = venue_details(page)
+    competition = competition_name(page)
+
+    possession_t1, possession_t2 = None, None
+    team1_stats, team2_stats = {}, {}
+    for group in stat_groups(page):
+        for stat in group.get('stats') or []:
+            values = stat.get('stats')
+            if stat.get('type') == 'title' or not values or len(values) != 2 or None in values:
+                continue
+            if stat.get('key') == POSSESSION_KEY:
+                possession_t1, possession_t2 = values
+                continue
+            stat_name = stat['title']
+            team1_stats[stat_name], team1_stats[stat_name + '_pc'] = split_stat(values[0])
+            team2_stats[stat_name], team2_stats[stat_name + '_pc'] = split_stat(values[1])
+
+    team1_data = {
+        'url': url, 'team': team1_name, 'ranking': None, 'opp': team2_name, 'opp_ranking': None,
+        'datetime': match_datetime, 'stadium': venue, 'referee': referee, 'attendance': attendance,
+        'competition': competition, 'possession': possession_t1, 'opp_possession': possession_t2,
+        'venue_href': venue_href
+    }
+    team2_data = {
+        'url': url, 'team': team2_name, 'ranking': None, 'opp': team1_name, 'opp_ranking': None,
+        'datetime': match_datetime, 'stadium': venue, 'referee': referee, 'attendance': attendance,
+        'competition': competition, 'possession': possession_t2, 'opp_possession': possession_t1,
+        'venue_href': venue_href
+    }
+    return team1_data, team2_data, team1_stats, team2_stats
+
+
+def page_match_details(next_data, url, require_stats=True):
+    """
+    Match details and stats from a page's parsed __NEXT_DATA__.
+
+    Args:
+        next_data: Parsed __NEXT_DATA__ (None if the page had none).
+        url: Match URL, stored with the rows.
+        require_stats: Treat a payload without stats as unusable (False for fixtures not played yet).
+
+    Returns:
+        Tuple of (team1 details, team2 details, team1 stats, team2 stats); None to skip a match that went to
+        extra time or penalties; False if the payload is missing or unusable, so the page needs a browser.
+    """
+    if next_data is None:
+        return False
+    try:
+        if went_to_extra_time(next_data):
+            print(f"Extra time match: {url}, skipping.")
+            return None
+        details = match_details(next_data, url)
+    except (KeyError, IndexError, TypeError) as e:
+        print(f"Page data not usable for URL: {url} ({e})")
+        return False
+    if require_stats and not details[2]:
+        return False
+    return details
+
+
+def set_rankings(team1_data, team2_data, rankings):
+    team1_data['ranking'], team2_data['ranking'] = rankings
+    team1_data['opp_ranking'], team2_data['opp_ranking'] = rankings[1], rankings[0]
+
+
+def html_rankings(html):
+    """FIFA rankings in a match page's header, read from its HTML with the browser scrape's XPaths."""
+    tree = lxml.html.fromstring(html)
+    rankings = []
+    for xpath in RANKING_XPATHS:
+        elements = tree.xpath(xpath)
+        rankings.append(elements[0].text_content().split('#')[-1].strip() if elements else None)
+    return rankings
+
+
+def html_match_details(html, url, require_stats=True):
+    """page_match_details for a match page's HTML (fetched, or replayed from the page cache), with rankings."""
+    details = page_match_details(extract_next_data(html), url, require_stats)
+    if details:
+        set_rankings(details[0], details[1], html_rankings(html))
+    return details
+
+
+def match_frame(team1_data, team2_data, team1_stats, team2_stats):
+    """Two typed rows per match, one per team, each with the opponent's stats as conc_ columns."""
+    df_team1 = pd.DataFrame([team1_stats])
+    df_team2 = pd.DataFrame([team2_stats])
+
+    df_team2_conceded = df_team2.rename(columns=lambda x: f'conc_{x}')
+    df_team1_combined = pd.concat([df_team1, df_team2_conceded], axis=1)
+
+    df_team1_conceded = df_team1.rename(columns=lambda x: f'conc_{x}')
+    df_team2_combined = pd.concat([df_team2, df_team1_conceded], axis=1)
+
+    df_team1_combined = pd.concat([pd.DataFrame([team1_data]), df_team1_combined], axis=1)
+    df_team2_combined = pd.concat([pd.DataFrame([team2_data]), df_team2_combined], axis=1)
+    df = pd.concat([df_team1_combined, df_team2_combined]).reset_index(drop=True)
+
+    df = clean_scraped(df)
+
+    cols_to_drop = [col for col in df.columns if '_pc' in col and df[col].isna().all()]
+    df = df.drop(columns=cols_to_drop)
+
+    df.columns = df.columns.str.lower().str.replace(' ', '_')
+    return enforce_schema(df)
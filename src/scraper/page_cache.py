@@ -0,0 +1,103 @@
+import gzip
+import hashlib
+import json
+import os
+import threading
+import time
+from src.scraper.next_data import extract_next_data, match_finished
+
+# Raw match pages, one gzipped JSON document per URL and tab, fanned out by the first two characters of the key
+CACHE_DIR = 'data/page_cache'
+
+# Seconds a page of a match that has not finished stays fresh; pages of finished matches never expire
+UNFINISHED_MAX_AGE = 15 * 60
+
+
+def page_key(url, tab='stats'):
+    """Cache key of a page: the SHA-256 of its URL and tab."""
+    return hashlib.sha256(f'{url}:tab={tab}'.encode('utf-8')).hexdigest()
+
+
+def page_path(url, tab='stats', cache_dir=CACHE_DIR):
+    key = page_key(url, tab)
+    return os.path.join(cache_dir, key[:2], f'{key}.json.gz')
+
+
+def load_entry(path):
+    """A cache document ({url, tab, finished, fetched, html}), None if it is missing or unreadable."""
+    try:
+        with gzip.open(path, 'rt', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def read_page(url, tab='stats', max_age=UNFINISHED_MAX_AGE, cache_dir=CACHE_DIR):
+    """
+    A cached page's HTML.
+
+    Args:
+        url: Match URL.
+        tab: Page tab the HTML was fetched from.
+        max_age: Seconds a page of an unfinished match stays fresh; None accepts any age.
+        cache_dir: Cache root.
+
+    Returns:
+        The HTML, or None if the page is not cached or is a stale page of an unfinished match.
+    """
+    entry = load_entry(page_path(url, tab, cache_dir))
+    if entry is None:
+        return None
+    if not entry['finished'] and max_age is not None and time.time() - entry['fetched'] > max_age:
+        return None
+    return entry['html']
+
+
+def write_page(url, html, finished, tab='stats', cache_dir=CACHE_DIR):
+    """
+    Store a page's HTML, replacing any earlier copy.
+
+    The document is written to a temporary file and moved into place, so concurrent scrapers never read a
+    half-written page.
+
+    Args:
+        url: Match URL.
+        html: The page's HTML.
+        finished: Whether the match has finished (its page then never expires).
+        tab: Page tab the HTML was fetched from.
+        cache_dir: Cache root.
+    """
+    path = page_path(url, tab, cache_dir)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    entry = {'url': url, 'tab': tab, 'finished': bool(finished), 'fetched': time.time(), 'html': html}
+    tmp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+    with gzip.open(tmp_path, 'wt', encoding='utf-8') as f:
+        json.dump(entry, f)
+    os.replace(tmp_path, path)
+
+
+def store_match_page(url, html, tab='stats', cache_dir=CACHE_DIR):
+    """
+    Cache a match page if it carries page data the parsers can replay; pages without it are not stored.
+
+    Returns:
+        Whether the page was stored.
+    """
+    next_data = extract_next_data(html)
+    if next_data is None:
+        return False
+    write_page(url, html, match_finished(next_data), tab, cache_dir)
+    return True
+
+
+def cached_pages(tab='stats', cache_dir=CACHE_DIR):
+    """Yield (url, html) of every cached page of a tab."""
+    if not os.path.isdir(cache_dir):
+        return
+    for root, _, files in os.walk(cache_dir):
+        for file in sorted(files):
+            if not file.endswith('.json.gz'):
+                continue
+            entry = load_entry(os.path.join(root, file))
+            if entry is not None and entry['tab'] == tab:
+                yield entry['url'], entry['html']
@@ -1,19 +1,15 @@
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from webdriver_manager.chrome import ChromeDriverManager
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException
 from scraper.common_functions import handle_cookies
+from src.scraper.browser import new_driver
 
 urls = []  # List to store all extracted URLs
 page = 0
 
 # Set up WebDriver
-service = Service(ChromeDriverManager().install())
-driver = webdriver.Chrome(service=service)
-driver.maximize_window()
+driver = new_driver()
 
 # Wait initialization
 wait = WebDriverWait(driver, 5)
@@ -0,0 +1,100 @@
+import numpy as np
+import pandas as pd
+
+# Ordered (pattern, round) rules, matched against the lower-cased competition; the first match wins.
+# A None round takes the number captured by the pattern.
+ROUND_RULES = [
+    (r'semi-final', 'SF'),
+    (r'quarter-final', 'QF'),
+    (r'^(?!.*semi)(?!.*quarter).*final', 'F'),
+    (r'round of 16', 16),
+    (r'round (\d+)', None),
+]
+
+# Ordered (pattern, competition, division, tournament) rules; the first match wins
+DIVISION_RULES = [
+    (r'friendly', 'friendly', 1, 0),
+    (r'qualification|qualifier', 'qualifier', 2, 0),
+    (r'nations league', 'nations league', 3, 0),
+    (r'euro', 'euros', 4, 1),
+    (r'copa america', 'copa america', 5, 1),
+    (r'world cup', 'world cup', 6, 1),
+]
+
+# Classification of every competition string seen so far: competition -> (competition, round, knockout,
+# tournament, division)
+COMPETITION_CACHE = {}
+
+
+def first_match(competitions, patterns):
+    """Index of the first pattern each competition contains, -1 if none."""
+    matched = np.full(len(competitions), -1)
+    for idx, pattern in enumerate(patterns):
+        hits = competitions.str.contains(pattern, regex=True, na=False).to_numpy() & (matched < 0)
+        matched[hits] = idx
+    return matched
+
+
+def classify_competitions(competitions):
+    """
+    Classify distinct competition strings with the round and division rule tables.
+
+    Args:
+        competitions: Series of distinct raw competition strings.
+
+    Returns:
+        DataFrame indexed by the raw strings with competition, round, knockout, tournament and division.
+    """
+    lowered = competitions.str.lower()
+    rounds = pd.Series(np.nan, index=competitions.index, dtype=object)
+
+    round_rule = first_match(lowered, [pattern for pattern, _ in ROUND_RULES])
+    for idx, (pattern, value) in enumerate(ROUND_RULES):
+        hits = round_rule == idx
+        if value is None:
+            rounds[hits] = lowered[hits].str.extract(pattern, expand=False).astype(int).tolist()
+        else:
+            rounds[hits] = value
+
+    division_rule = first_match(lowered, [pattern for pattern, *_ in DIVISION_RULES])
+    names = np.array([name for _, name, _, _ in DIVISION_RULES] + [None], dtype=object)[division_rule]
+    divisions = np.array([division for *_, division, _ in DIVISION_RULES] + [0])[division_rule]
+    tournaments = np.array([tournament for *_, tournament in DIVISION_RULES] + [0])[division_rule]
+    # Friendlies have no round
+    rounds[division_rule == 0] = 0
+
+    return pd.DataFrame({
+        'competition': np.where(division_rule >= 0, names, competitions.to_numpy(dtype=object)),
+        'round': rounds.to_numpy(),
+        'knockout': (round_rule >= 0).astype(int),
+        'tournament': tournaments,
+        'division': divisions,
+    }, index=competitions.to_numpy())
+
+
+def parse_competitions(df):
+    """
+    Replace df's competition strings with their cleaned name and add round, knockout, tournament and division.
+
+    Only competition strings not seen before are classified; the rest come from COMPETITION_CACHE.
+
+    Args:
+        df: The DataFrame containing a raw competition column.
+
+    Returns:
+        The DataFrame with the parsed competition columns.
+    """
+    uniques = pd.Series(df['competition'].dropna().unique(), dtype=object)
+    new = uniques[~uniques.isin(list(COMPETITION_CACHE))].reset_index(drop=True)
+    if len(new):
+        COMPETITION_CACHE.update(zip(new, classify_competitions(new).itertuples(index=False, name=None)))
+
+    columns = ['competition', 'round', 'knockout', 'tournament', 'division']
+    parsed = pd.DataFrame([COMPETITION_CACHE[competition] for competition in uniques], index=uniques.to_numpy(),
+                          columns=columns)
+    rows = parsed.reindex(df['competition'].to_numpy())
+    df['competition'] = rows['competition'].to_numpy()
+    for col in ['tournament', 'division', 'knockout']:
+        df[col] = rows[col].fillna(0).astype(int).to_numpy()
+    df['round'] = rows['round'].to_numpy()
+    return df
@@ -0,0 +1,57 @@
+import os
+import pickle
+import pandas as pd
+
+# Registries loaded in this process: absolute path -> {name: id}
+REGISTRIES = {}
+
+
+def load_registry(path):
+    """
+    Load an ID registry (a pickled {name: id} dict) once per process.
+
+    Args:
+        path: Path of the pickled registry; a missing file is an empty registry.
+
+    Returns:
+        The registry dict, shared by every caller in the process however it spells the path.
+    """
+    key = os.path.abspath(path)
+    if key not in REGISTRIES:
+        if os.path.exists(key):
+            with open(key, 'rb') as f:
+                REGISTRIES[key] = pickle.load(f)
+        else:
+            REGISTRIES[key] = {}
+    return REGISTRIES[key]
+
+
+def register_ids(values, path):
+    """
+    Append any new names to a registry, giving each the next free id, and save it if it grew.
+
+    Existing names keep their ids, so ids baked into saved features and models stay valid.
+
+    Args:
+        values: Array-like of names (e.g. every team in the data); missing values are skipped.
+        path: Path of the pickled registry.
+
+    Returns:
+        The registry dict.
+    """
+    registry = load_registry(path)
+    names = pd.Series(pd.unique(pd.Series(values).dropna()), dtype=object)
+    new = names[~names.isin(list(registry))].tolist()
+    if new:
+        next_id = max(registry.values(), default=0) + 1
+        registry.update({name: idx for idx, name in enumerate(new, start=next_id)})
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with open(path, 'wb') as f:
+            pickle.dump(registry, f)
+    return registry
+
+
+def map_ids(values, path):
+    """Look up each name's id in a registry (NaN for names not registered)."""
+    # Categorical names would give categorical ids
+    return values.astype(object).map(load_registry(path))
@@ -0,0 +1,61 @@
+import numpy as np
+import pandas as pd
+
+
+def mirror_rows(df, key='game_id', side='team'):
+    """
+    Position of each row's mirror row: the other side's row in the same game.
+
+    Each (game, side) pair takes its last row. The mirror is the pair's opponent in the game, taking the
+    last side to appear when a game has more than two, so duplicated rows resolve as they did with the
+    per-game stats dicts.
+
+    Args:
+        df: The DataFrame containing match data, one row per team per game.
+        key: Column identifying the game.
+        side: Column identifying the team within the game.
+
+    Returns:
+        int array of row positions aligned with df, -1 where the game has no other side.
+    """
+    games = pd.factorize(df[key])[0]
+    sides = pd.factorize(df[side], use_na_sentinel=False)[0]
+    rows = pd.DataFrame({'game': games, 'side': sides, 'pos': np.arange(len(df))})[games >= 0]
+
+    # One entry per (game, side) in order of first appearance, holding the side's last row
+    entries = rows.drop_duplicates(['game', 'side'], keep='first')[['game', 'side']]
+    entries = entries.merge(rows.drop_duplicates(['game', 'side'], keep='last'), on=['game', 'side'])
+    entries = entries.sort_values('game', kind='stable').reset_index(drop=True)
+
+    game_codes = entries['game'].to_numpy()
+    last = np.searchsorted(game_codes, game_codes, side='right') - 1
+    first = np.searchsorted(game_codes, game_codes, side='left')
+    own = np.arange(len(entries))
+    opponent = np.where(own != last, last, last - 1)
+    opponent_pos = np.where(opponent >= first, entries['pos'].to_numpy()[np.maximum(opponent, 0)], -1)
+
+    mirror = np.full(len(df), -1)
+    lookup = rows.merge(entries.assign(mirror=opponent_pos)[['game', 'side', 'mirror']], on=['game', 'side'])
+    mirror[lookup['pos'].to_numpy()] = lookup['mirror'].to_numpy()
+    return mirror
+
+
+def add_opponent_columns(df, columns, prefix='conc_', key='game_id', side='team'):
+    """
+    Add the opponent's value of each column (e.g. conc_total_tackles) from its mirror row in one step.
+
+    Args:
+        df: The DataFrame containing match data, one row per team per game.
+        columns: Columns to mirror.
+        prefix: Prefix of the added columns.
+        key: Column identifying the game.
+        side: Column identifying the team within the game.
+
+    Returns:
+        The DataFrame with a {prefix}{column} column per column, NaN where there is no opponent row.
+    """
+    mirror = mirror_rows(df, key, side)
+    values = df[columns].reset_index(drop=True).reindex(mirror)
+    for col in columns:
+        df[f'{prefix}{col}'] = values[col].to_numpy()
+    return df
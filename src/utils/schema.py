@@ -0,0 +1,70 @@
+import pandas as pd
+
+# Match data columns: column -> (dtype, nullable, unit). A None dtype leaves the column as loaded (free text,
+# and datetimes, which storage parses). Any column not listed is a match stat (see column_spec).
+SCHEMA = {
+    'url': (None, False, None),
+    'venue_href': (None, True, None),
+    'datetime': (None, False, None),
+    'competition': (None, False, None),
+    'round': (None, True, None),
+    'season': (None, True, None),
+    'tourney_id': (None, True, None),
+    'division': (None, True, None),
+    'team': ('category', False, None),
+    'opp': ('category', False, None),
+    'stadium': ('category', True, None),
+    'referee': ('category', True, None),
+    'ranking': ('Int16', True, 'rank'),
+    'opp_ranking': ('Int16', True, 'rank'),
+    'attendance': ('Int32', True, 'spectators'),
+    'game_id': (None, False, None),
+}
+
+# Characters the scraped stat values carry around the numbers, e.g. '45 (52%)' or '#12'
+SCRAPE_NOISE = r'[()%#]'
+
+
+def stat_unit(column):
+    if column.endswith('_pc') or column.endswith('possession'):
+        return '%'
+    if 'xg' in column:
+        return 'xG'
+    return 'count'
+
+
+def column_spec(column):
+    """(dtype, nullable, unit) of a column; unlisted columns are nullable float32 stats."""
+    return SCHEMA.get(column, ('float32', True, stat_unit(column)))
+
+
+def clean_scraped(df):
+    """Strip the brackets, % and # from scraped values in a single pass and turn empty cells into NA."""
+    return df.replace(SCRAPE_NOISE, '', regex=True).replace('', pd.NA)
+
+
+def enforce_schema(df):
+    """
+    Give each column of match data its schema dtype (in place).
+
+    Text numbers are parsed once, ignoring thousands separators; values that are not numbers become NA.
+    Columns that already have their dtype are left alone, so typed data passes through for free.
+
+    Args:
+        df: The DataFrame containing match data.
+
+    Returns:
+        The DataFrame with compact dtypes: float32 stats, nullable integer rankings and attendance,
+        categorical team, opp, stadium and referee.
+    """
+    for col in df.columns:
+        dtype = column_spec(col)[0]
+        if dtype is None or df[col].dtype == dtype:
+            continue
+        values = df[col]
+        if dtype != 'category':
+            if values.dtype == object:
+                values = values.astype(str).str.replace(',', '', regex=False)
+            values = pd.to_numeric(values, errors='coerce')
+        df[col] = values.astype(dtype)
+    return df
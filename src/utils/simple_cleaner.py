@@ -1,6 +1,7 @@
 import pandas as pd
-import re
-import pickle
+from src.utils.competition import parse_competitions
+from src.utils.opponent_stats import add_opponent_columns
+from src.utils.id_registry import register_ids, map_ids
 
 
 def cleaner(raw_data):
@@ -19,61 +20,8 @@ def cleaner(raw_data):
     raw_data['longitude'] = raw_data['longitude'].astype(float)
     # make datetime column to datetime type
     raw_data['datetime'] = pd.to_datetime(raw_data['datetime'])
-    raw_data['tournament'] = 0
-    raw_data['division'] = 0
-    raw_data['knockout'] = 0
     # clean competition column
-    for index, row in raw_data.iterrows():
-        competition = row['competition'].lower()
-        if 'round' in competition:
-            if 'round of 16' in competition:
-                raw_data.at[index, 'round'] = 16
-                raw_data.at[index, 'knockout'] = 1
-            else:
-                match = re.search(r'round (\d+)', competition)
-                if match:
-                    raw_data.at[index, 'round'] = int(match.group(1))
-                    raw_data.at[index, 'knockout'] = 1
-
-        # Check for semi-final, quarter-final, and final
-        if 'semi-final' in competition:
-            raw_data.at[index, 'round'] = 'SF'
-            raw_data.at[index, 'knockout'] = 1
-        elif 'quarter-final' in competition:
-            raw_data.at[index, 'round'] = 'QF'
-            raw_data.at[index, 'knockout'] = 1
-        elif 'final' in competition and 'semi' not in competition and 'quarter' not in competition:
-            raw_data.at[index, 'round'] = 'F'
-            raw_data.at[index, 'knockout'] = 1
-        if 'friendly' in competition:
-            raw_data.at[index, 'competition'] = 'friendly'
-            raw_data.at[index, 'division'] = 1
-            raw_data.at[index, 'round'] = 0
-        elif 'qualification' in competition:
-            raw_data.at[index, 'competition'] = 'qualifier'
-            raw_data.at[index, 'division'] = 2
-        elif 'qualifier' in competition:
-            raw_data.at[index, 'competition'] = 'qualifier'
-            raw_data.at[index, 'division'] = 2
-        elif 'nations league' in competition:
-            raw_data.at[index, 'competition'] = 'nations league'
-            raw_data.at[index, 'division'] = 3
-        elif 'euros' in competition:
-            raw_data.at[index, 'competition'] = 'euros'
-            raw_data.at[index, 'tournament'] = 1
-            raw_data.at[index, 'division'] = 4
-        elif 'euro' in competition:
-            raw_data.at[index, 'competition'] = 'euros'
-            raw_data.at[index, 'tournament'] = 1
-            raw_data.at[index, 'division'] = 4
-        elif 'copa america' in competition:
-            raw_data.at[index, 'competition'] = 'copa america'
-            raw_data.at[index, 'tournament'] = 1
-            raw_data.at[index, 'division'] = 5
-        elif 'world cup' in competition:
-            raw_data.at[index, 'competition'] = 'world cup'
-            raw_data.at[index, 'tournament'] = 1
-            raw_data.at[index, 'division'] = 6
+    raw_data = parse_competitions(raw_data)
 
     # cleaned_data = raw_data.drop(columns=[
     #     'big_chances_missed', 'shots_off_target', 'hit_woodwork', 'expected_goals_(xg)', 'xg_open_play', 'xg_set_play',
@@ -85,51 +33,14 @@ def cleaner(raw_data):
     # rename opp_half to passes_opp_half
     cleaned_data.rename(columns={'opposition_half': 'passes_opp_half'}, inplace=True)
 
-    # Create a dictionary to store the statistics for each team in each game
-    stats_dict = {}
-
-    # Populate the dictionary
-    for index, row in cleaned_data.iterrows():
-        game_id = row['game_id']
-        team = row['team']
-        total_tackles = row['total_tackles']
-        passes_own_half = row['passes_own_half']
-        passes_opp_half = row['passes_opp_half']
-
-        if game_id not in stats_dict:
-            stats_dict[game_id] = {}
-
-        stats_dict[game_id][team] = {
-            'total_tackles': total_tackles,
-            'passes_own_half': passes_own_half,
-            'passes_opp_half': passes_opp_half
-        }
-
-    # Function to find the opponent's statistics
-    def get_opponent_stats(row):
-        game_id = row['game_id']
-        team = row['team']
-        opponent_stats = {'conc_total_tackles': None, 'conc_passes_own_half': None, 'conc_passes_opp_half': None}
-
-        for opp_team, stats in stats_dict[game_id].items():
-            if opp_team != team:
-                opponent_stats['conc_total_tackles'] = stats['total_tackles']
-                opponent_stats['conc_passes_own_half'] = stats['passes_own_half']
-                opponent_stats['conc_passes_opp_half'] = stats['passes_opp_half']
-
-        return pd.Series(opponent_stats)
-
-    # Apply the function to get the opponent's statistics
-    cleaned_data[['conc_total_tackles', 'conc_passes_own_half', 'conc_passes_opp_half']] = cleaned_data.apply(get_opponent_stats, axis=1)
+    # Opponent's stats come from the other row of the same game
+    cleaned_data = add_opponent_columns(cleaned_data, ['total_tackles', 'passes_own_half', 'passes_opp_half'])
 
 
-    teams = pd.unique(cleaned_data[['team', 'opp']].values.ravel('K'))
-    team_id_mapping = {team: idx for idx, team in enumerate(teams, start=1)}
-    # Save the dictionary to a file
-    with open('team_id_mapping.pkl', 'wb') as f:
-        pickle.dump(team_id_mapping, f)
-    cleaned_data['team_id'] = cleaned_data['team'].map(team_id_mapping)
-    cleaned_data['opp_id'] = cleaned_data['opp'].map(team_id_mapping)
+    # Teams keep their ids across runs; only new teams are appended to the registry
+    register_ids(cleaned_data[['team', 'opp']].values.ravel('K'), 'team_id_mapping.pkl')
+    cleaned_data['team_id'] = map_ids(cleaned_data['team'], 'team_id_mapping.pkl')
+    cleaned_data['opp_id'] = map_ids(cleaned_data['opp'], 'team_id_mapping.pkl')
 
     return cleaned_data
 
@@ -0,0 +1,119 @@
+import os
+import pandas as pd
+from src.utils.schema import enforce_schema
+
+# Master datasets: name -> path without extension (the CSV is the legacy copy, .parquet the typed one)
+DATASETS = {
+    'int_raw_master': 'data/raw/int_raw_master',
+    'processed_master_throws_6': 'data/processed_master_throws_6',
+    'prem_raw_master': 'data/prem/raw/prem_raw_master',
+    'prem_results_master': 'data/prem/raw/prem_results_master',
+}
+
+# Datasets of match data, stored and loaded with the column dtypes of src.utils.schema
+MATCH_DATASETS = {'int_raw_master', 'processed_master_throws_6', 'prem_raw_master'}
+
+# Datetime column of each dataset, stored as UTC timestamps so it never has to be re-parsed
+DATETIME_COLUMNS = {
+    'prem_results_master': 'DateTime',
+}
+
+
+def dataset_path(name, extension='parquet'):
+    return f'{DATASETS[name]}.{extension}'
+
+
+def datetime_column(name):
+    return DATETIME_COLUMNS.get(name, 'datetime')
+
+
+def to_utc(value):
+    """Parse a datetime bound, treating naive values as UTC like the stored column."""
+    value = pd.Timestamp(value)
+    return value.tz_localize('UTC') if value.tzinfo is None else value.tz_convert('UTC')
+
+
+def typed_frame(df, name):
+    """
+    Give a DataFrame the types it is stored with.
+
+    Match data gets its schema dtypes, the datetime column becomes UTC timestamps and remaining object
+    columns mixing strings with numbers become strings, since a Parquet column holds a single type.
+    """
+    df = df.copy()
+    if name in MATCH_DATASETS:
+        df = enforce_schema(df)
+    column = datetime_column(name)
+    if column in df.columns:
+        df[column] = pd.to_datetime(df[column], utc=True, format='mixed')
+    for col in df.columns[df.dtypes == object]:
+        df[col] = df[col].where(df[col].isna(), df[col].astype(str))
+    return df
+
+
+def write_dataset(df, name):
+    """
+    Write a master dataset as typed Parquet.
+
+    Args:
+        df: The DataFrame to store.
+        name: Dataset name, one of DATASETS.
+    """
+    path = dataset_path(name)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    typed_frame(df, name).to_parquet(path, index=False)
+
+
+def read_dataset(name, columns=None, start=None, end=None, competitions=None):
+    """
+    Read a master dataset, loading only the columns and rows asked for.
+
+    The datetime and competition conditions are pushed down to the Parquet reader, so row groups outside
+    them are skipped rather than loaded and filtered.
+
+    Args:
+        name: Dataset name, one of DATASETS.
+        columns: Optional list of columns to load (default all).
+        start: Optional earliest datetime to load (inclusive).
+        end: Optional latest datetime to load (exclusive).
+        competitions: Optional list of competitions to load.
+
+    Returns:
+        The DataFrame with its stored dtypes (the schema dtypes for match data; files written before the
+        schema are coerced on load); the datetime column is already parsed.
+    """
+    filters = []
+    if start is not None:
+        filters.append((datetime_column(name), '>=', to_utc(start)))
+    if end is not None:
+        filters.append((datetime_column(name), '<', to_utc(end)))
+    if competitions is not None:
+        filters.append(('competition', 'in', list(competitions)))
+    df = pd.read_parquet(dataset_path(name), columns=columns, filters=filters or None)
+    return enforce_schema(df) if name in MATCH_DATASETS else df
+
+
+def migrate_csv(name, **read_csv_kwargs):
+    """
+    Convert a dataset's legacy CSV to Parquet.
+
+    Args:
+        name: Dataset name, one of DATASETS.
+        **read_csv_kwargs: Extra pd.read_csv arguments (e.g. encoding).
+
+    Returns:
+        The Parquet path written.
+    """
+    write_dataset(pd.read_csv(dataset_path(name, 'csv'), **read_csv_kwargs), name)
+    return dataset_path(name)
+
+
+def migrate_all():
+    """One-shot migration of every dataset whose CSV exists to Parquet."""
+    for name in DATASETS:
+        if os.path.exists(dataset_path(name, 'csv')):
+            print(f"Migrating {dataset_path(name, 'csv')} -> {migrate_csv(name)}")
+
+
+if __name__ == '__main__':
+    migrate_all()
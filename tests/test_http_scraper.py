@@ -0,0 +1,84 @@
+import os
+import threading
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+import pandas as pd
+import pytest
+from src.scraper.http_scraper import http_fixture, http_pages, http_scrape, page_url
+from src.scraper.next_data import html_match_details, match_frame
+
+# Saved match pages, trimmed to the header and __NEXT_DATA__ the parsers read
+FIXTURES = os.path.join(os.path.dirname(__file__), 'fixtures', 'match_pages')
+
+# Match URLs whose last path segment names the saved page served for them
+URLS = {
+    name: f'https://www.fotmob.com/en-GB/matches/{name.replace("_", "-")}/{name}#4407872'
+    for name in ['finished', 'fixture', 'extra_time', 'no_next_data']
+}
+
+
+def saved_page(name):
+    with open(os.path.join(FIXTURES, f'{name}.html'), encoding='utf-8') as f:
+        return f.read()
+
+
+class FixtureHandler(SimpleHTTPRequestHandler):
+    """Serve '/.../<name>:tab=stats' from FIXTURES/<name>.html."""
+
+    def translate_path(self, path):
+        name = path.rsplit('/', 1)[-1].split(':')[0]
+        return os.path.join(FIXTURES, f'{name}.html')
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture(scope='module')
+def base_url():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), partial(FixtureHandler, directory=FIXTURES))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f'http://127.0.0.1:{server.server_address[1]}'
+    server.shutdown()
+    server.server_close()
+
+
+def test_page_url_keeps_path_and_drops_fragment():
+    assert page_url(URLS['finished']) == URLS['finished'] + ':tab=stats'
+    assert page_url(URLS['finished'], 'http://127.0.0.1:8000/') == \
+        'http://127.0.0.1:8000/en-GB/matches/finished/finished:tab=stats'
+
+
+def test_http_pages_match_frame_and_browser_fallback(base_url):
+    frames, needs_browser = http_pages(list(URLS.values()), max_workers=4, use_cache=False, base_url=base_url)
+
+    expected = match_frame(*html_match_details(saved_page('finished'), URLS['finished']))
+    assert len(frames) == 1
+    pd.testing.assert_frame_equal(frames[0], expected)
+    assert frames[0]['team'].tolist() == ['Argentina', 'Canada']
+    assert frames[0]['ranking'].tolist() == [1, 49]
+    assert frames[0]['throws'].tolist() == [21, 26]
+    assert frames[0]['conc_throws'].tolist() == [26, 21]
+    assert frames[0]['accurate_passes_pc'].tolist() == [88, 82]
+    # Rows keep the match URL, not the local one ('#' is stripped with the rest of the scrape noise)
+    assert frames[0]['url'].tolist() == [URLS['finished'].replace('#', '')] * 2
+
+    # No stats yet and no page data need a browser; the extra-time match is skipped
+    assert needs_browser == [URLS['fixture'], URLS['no_next_data']]
+
+
+def test_http_scrape_without_browser(base_url):
+    frames = http_scrape(list(URLS.values()), max_workers=4, browser_fallback=False, use_cache=False,
+                         base_url=base_url)
+    expected = match_frame(*html_match_details(saved_page('finished'), URLS['finished']))
+    assert len(frames) == 1
+    pd.testing.assert_frame_equal(frames[0], expected)
+
+
+def test_http_fixture_without_stats(base_url):
+    df = http_fixture(URLS['fixture'], use_cache=False, base_url=base_url)
+    assert df['team'].tolist() == ['Uruguay', 'Colombia']
+    assert df['opp'].tolist() == ['Colombia', 'Uruguay']
+    assert df['ranking'].tolist() == [11, 12]
+    assert df['opp_ranking'].tolist() == [12, 11]
+    assert http_fixture(URLS['no_next_data'], use_cache=False, base_url=base_url) is None